@@ -1,6 +1,8 @@
 from __future__ import annotations
 from re import X
-from typing import Optional
+import hashlib
+from typing import Callable, Iterator, Optional
+from weakref import WeakValueDictionary
 from a2_support import UserInterface, TextInterface
 from constants import *
 
@@ -20,16 +22,80 @@ def load_game(filename: str) -> list['Level']:
         A list of all Level instances to play in the game
     """
     levels = []
+    for dimensions, rows in read_layouts(filename):
+        levels.append(intern_level(level_key(dimensions, rows),
+                                   lambda: build_level(dimensions, rows)))
+    return levels
+
+
+def read_layouts(filename: str) -> list[tuple[tuple[int, int], list[str]]]:
+    """ Reads the dimensions and rows of every level in a game file, without
+        building the levels.
+
+    Parameters:
+        filename: The path to the game file
+
+    Returns:
+        A (dimensions, rows) pair for each level, in order
+    """
+    layouts = []
     with open(filename, 'r') as file:
         for line in file:
             line = line.strip()
             if line.startswith('Maze'):
                 _, _, dimensions = line[5:].partition(' - ')
-                dimensions = [int(item) for item in dimensions.split()]
-                levels.append(Level(dimensions))
-            elif len(line) > 0 and len(levels) > 0:
-                levels[-1].add_row(line)
-    return levels
+                dimensions = tuple(int(item) for item in dimensions.split())
+                layouts.append((dimensions, []))
+            elif len(line) > 0 and len(layouts) > 0:
+                layouts[-1][1].append(line)
+    return layouts
+
+
+def build_level(dimensions: tuple[int, int], rows: list[str]) -> 'Level':
+    """ Builds a level from its dimensions and the rows of its game file. """
+    level = Level(dimensions)
+    for row in rows:
+        level.add_row(row)
+    return level
+
+
+# untouched levels by level_key, kept while any copy of them is in use
+_interned_levels: WeakValueDictionary[bytes, 'Level'] = WeakValueDictionary()
+
+
+def level_key(dimensions: tuple[int, int], rows: list[str]) -> bytes:
+    """ Returns a key identifying a level by its dimensions and rows, the
+        same for every game file that contains the level. The registered
+        entity ids are part of the key, as they decide which items the rows
+        hold.
+    """
+    text = ' '.join(str(item) for item in dimensions) + '\n' + '\n'.join(rows)
+    text += '\n' + ''.join(sorted(ENTITY_TYPES))
+    return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+
+def intern_level(key: bytes, build: Callable[[], 'Level']) -> 'Level':
+    """ Returns a new copy of the level with the given key, only calling build
+        to make the level if no copy of it is still in use. Copies share the
+        tiles and items of the level until they change them.
+
+    Parameters:
+        key: The level_key of the level
+        build: Makes the level when it is not already interned
+
+    Returns:
+        A Level that can be played independently of every other copy
+    """
+    level = _interned_levels.get(key)
+    if level is None:
+        level = _interned_levels[key] = build()
+    return level.copy()
+
+
+# values of Maze.get_cost for cells that cannot be entered, any other value is
+# the damage taken by entering the cell
+BLOCKED_CELL = 255
+OUTSIDE_CELL = 254
 
 
 class Tile(object):
@@ -133,6 +199,43 @@ class Door(Tile):
         self._is_blocking = False
 
 
+def _byte_table(values: dict[str, int], default: int) -> bytes:
+    """ Builds a bytes.translate table mapping characters to values. """
+    table = bytearray([default]) * 256
+    for character, value in values.items():
+        table[ord(character)] = value
+    return bytes(table)
+
+
+def _find_all(text: str, character: str) -> Iterator[int]:
+    """ Yields the index of every occurrence of character in text. """
+    index = text.find(character)
+    while index != -1:
+        yield index
+        index = text.find(character, index + 1)
+
+
+class _TileLookup(dict):
+    """ Maps game file characters to tiles, any unknown character is empty. """
+    def __missing__(self, key: str) -> Tile:
+        return self[EMPTY]
+
+
+# tiles other than doors have no state, so one of each is shared by every maze
+_SHARED_TILES = _TileLookup({WALL: Wall(), LAVA: Lava(), LAVA.lower(): Lava(),
+                             EMPTY: Empty()})
+_DOOR_IDS = (DOOR, DOOR.lower())
+# game file character to tile id, and to the cost of entering the tile
+_TILE_IDS = _byte_table({**{character: ord(tile.get_id()) for character, tile
+                            in _SHARED_TILES.items()},
+                         **{door: ord(DOOR) for door in _DOOR_IDS}},
+                        ord(EMPTY))
+_TILE_COSTS = _byte_table({**{character: tile.damage() for character, tile
+                              in _SHARED_TILES.items()},
+                           WALL: BLOCKED_CELL,
+                           **{door: BLOCKED_CELL for door in _DOOR_IDS}}, 0)
+
+
 class Entity(object):
     """ Entity class is the abstract class that provides the functionality for
         all entities within the game.
@@ -462,7 +565,7 @@ class Inventory(object):
     items obtained throughout the game. Can be changed over the course of game.
     """
 
-    def __init__(self, initial_items: Optional[list[Item]] = []) -> None:
+    def __init__(self, initial_items: Optional[list[Item]] = None) -> None:
         """ Sets up the inventory with any optional initial items stated.
 
         Parameters:
@@ -470,7 +573,9 @@ class Inventory(object):
                                    to the inventory to make adding onto the
                                    inventory easier
         """
-        self._items = initial_items
+        # a fresh list each time, a shared default would leak items between
+        # players
+        self._items = initial_items if initial_items is not None else []
         self._inventory = self.get_items()
 
     def add_item(self, item: Item) -> None:
@@ -553,6 +658,24 @@ class Maze(object):
         self._maze_ids = []
         self._row = []
         self._row_ids = []
+        self._doors = []
+        self._door_cells = set()
+
+        # flat table of the cost of entering each cell, padded by a border of
+        # OUTSIDE_CELL so that neighbours never need a bounds check
+        self._stride = self._columns + 2
+        self._costs = bytearray([OUTSIDE_CELL]) * (self._stride
+                                                   * (self._rows + 2))
+        self._offsets = {delta: delta[0] * self._stride + delta[1]
+                         for delta in MOVE_DELTAS.values()}
+        # rendered rows, and the whole maze once it has been asked for
+        self._row_strings = []
+        self._string = None
+        self._revision = 0
+        # the maze this was copied from, if any, and its revision at the time
+        # or None if the mazes already differed
+        self._origin = None
+        self._origin_revision = None
 
     def get_dimensions(self) -> tuple[int, int]:
         """ Getter method to check the rows and columns from outside the class.
@@ -580,39 +703,172 @@ class Maze(object):
         Parameters:
             row (str): The row instance to be added
         """
-        self._row = []
-        self._row_ids = []
+        row_number = len(self._maze)
+        self._row_ids = list(row)
+        self._row = list(map(_SHARED_TILES.__getitem__, row))
+
+        # doors are the only tiles with state, so each gets its own
+        columns = sorted(column for door in _DOOR_IDS
+                         for column in _find_all(row, door))
+        for column in columns:
+            self._row[column] = Door()
+            self._doors.append((row_number, column))
+            self._door_cells.add((row_number, column))
+
+        self._maze.append(self._row)
+        self._maze_ids.append(self._row_ids)
+
+        # characters map straight to tile ids and costs through byte tables
+        encoded = row.encode('latin-1', 'replace')
+        self._row_strings.append(encoded.translate(_TILE_IDS).decode('latin-1'))
+        # cells outside the dimensions stay OUTSIDE_CELL
+        if row_number < self._rows:
+            start = (row_number + 1) * self._stride + 1
+            costs = encoded[:self._columns].translate(_TILE_COSTS)
+            self._costs[start:start + len(costs)] = costs
+        self._string = None
+        self._revision += 1
+
+    def unlock_door(self, position: Optional[tuple[int, int]] = None) -> None:
+        """ Method to change the state of the door from being locked to
+            unlocked, that is self._is_blocking becomes false and the
+            tile_id is altered.
+
+        Parameters:
+            position (tuple): Position of the door to unlock, every door is
+                              unlocked if not given
+        """
+        doors = self._doors if position is None else [position]
+        for row, column in doors:
+            tile = self._maze[row][column]
+            tile.unlock()
+            if row < self._rows and column < self._columns:
+                self._costs[self.index_of((row, column))] = \
+                    self._tile_cost(tile)
+
+        # only the rows holding the doors need rendering again
+        for row in {row for row, _ in doors}:
+            self._row_strings[row] = ''.join(tile.get_id()
+                                             for tile in self._maze[row])
+        self._string = None
+        self._revision += 1
+
+    def get_origin(self) -> Maze:
+        """ Getter method for the maze this one was first copied from, or this
+            maze if it is not a copy. Copies of a maze share its layout.
+        """
+        return self if self._origin is None else self._origin
 
-        for tile in row:
-            self._row_ids.append(tile)
+    def matches_origin(self) -> bool:
+        """ Checks if neither this maze nor the maze it was first copied from
+            have changed through unlock_door or add_row since the copy, so
+            that anything derived from one holds for the other.
+        """
+        if self._origin is None:
+            return True
+        return self._revision == 0 \
+            and self._origin_revision == self._origin.get_revision()
 
-            # checks which tile is added
-            if tile.lower() == DOOR.lower():
-                tile = Door()
+    def get_revision(self) -> int:
+        """ Getter method for a counter that goes up whenever the maze changes,
+            so that anything derived from the maze knows when to update.
 
-            elif tile.lower() == LAVA.lower():
-                tile = Lava()
+        Returns:
+            The revision number of the maze
+        """
+        return self._revision
 
-            elif tile == WALL.lower():
-                tile = Wall()
+    def get_door_positions(self) -> list[tuple[int, int]]:
+        """ Getter method for the positions of every door, locked or not, in
+            the order they appear in the maze.
 
-            else:
-                tile = Empty()
+        Returns:
+            A list of door positions (row, column)
+        """
+        return self._doors
 
-            self._row.append(tile)
+    def copy(self) -> Maze:
+        """ Makes a copy of the maze whose doors can be unlocked without
+            affecting this maze. Other tiles have no state so are shared.
 
-        self._maze.append(self._row)
-        self._maze_ids.append(self._row_ids)
+        Returns:
+            A new Maze instance with the same tiles and door states
+        """
+        maze = Maze((self._rows, self._columns))
+        maze._maze = [list(row) for row in self._maze]
+        maze._maze_ids = [list(row) for row in self._maze_ids]
+        maze._doors = list(self._doors)
+        maze._door_cells = set(self._door_cells)
+        maze._costs = bytearray(self._costs)
+        maze._row_strings = list(self._row_strings)
+        maze._string = self._string
+        maze._origin = self.get_origin()
+        if self.matches_origin():
+            maze._origin_revision = maze._origin.get_revision()
+        for row, column in self._doors:
+            door = Door()
+            if not self._maze[row][column].is_blocking():
+                door.unlock()
+            maze._maze[row][column] = door
+        return maze
+
+    @staticmethod
+    def _tile_cost(tile: Tile) -> int:
+        """ Returns the cost table entry for a tile. """
+        if tile.is_blocking():
+            return BLOCKED_CELL
+        return min(tile.damage(), OUTSIDE_CELL - 1)
+
+    def get_cost(self, position: tuple[int, int]) -> int:
+        """ Method that checks what entering a position costs, safe to call
+            with any position.
 
-    def unlock_door(self) -> None:
-        """ Method to change the state of the door from being locked to
-            unlocked, that is self._is_blocking becomes false and the
-            tile_id is altered.
+        Parameters:
+            position (tuple): Position (row, column) to be entered
+
+        Returns:
+            BLOCKED_CELL if the tile there is blocking, OUTSIDE_CELL if the
+            position is outside the maze, else the damage of the tile.
+        """
+        row = position[0] + 1
+        column = position[1] + 1
+        if 0 <= row < self._rows + 2 and 0 <= column < self._stride:
+            return self._costs[row * self._stride + column]
+        return OUTSIDE_CELL
+
+    def is_door(self, position: tuple[int, int]) -> bool:
+        """ Checks if there is a door, locked or not, at a position. """
+        return position in self._door_cells
+
+    def index_of(self, position: tuple[int, int]) -> int:
+        """ Converts a position inside the maze to its index within the cost
+            table.
+        """
+        return (position[0] + 1) * self._stride + position[1] + 1
+
+    def position_of(self, index: int) -> tuple[int, int]:
+        """ Converts an index within the cost table back to a position. """
+        row, column = divmod(index, self._stride)
+        return row - 1, column - 1
+
+    def get_cost_table(self) -> bytearray:
+        """ Getter method for the flat cost table, see get_cost. Rows are
+            get_stride() long and the table has a one cell border, so
+            index_of(position) plus a neighbour offset is always in range for
+            a position inside the maze. It is updated in place when doors
+            unlock and must not be changed by callers.
         """
-        for row in self._maze:
-            for tile in row:
-                if tile.get_id() == 'D':
-                    row[row.index(tile)].unlock()
+        return self._costs
+
+    def get_stride(self) -> int:
+        """ Getter method for the length of a row of the cost table. """
+        return self._stride
+
+    def get_neighbour_offsets(self) -> dict[tuple[int, int], int]:
+        """ Getter method that maps each move delta to the difference it makes
+            to an index within the cost table.
+        """
+        return self._offsets
 
     def get_tiles(self) -> list[list[Tile]]:
         """ Getter method to check the tiles within the maze.
@@ -641,18 +897,11 @@ class Maze(object):
         Returns:
             String representation of this maze. Each line in the output is a row
             in the maze (each Tile instance is represented by its ID).
+            Doors must be unlocked through unlock_door for this to update.
         """
-        self._rep = []
-
-        for row in self._maze:
-            self._reps = []
-
-            for tile in row:
-                self._reps.append(''.join(tile.get_id()))
-
-            self._rep.append(''.join(self._reps))
-
-        return '\n'.join(self._rep)
+        if self._string is None:
+            self._string = '\n'.join(self._row_strings)
+        return self._string
 
     def __repr__(self) -> str:
         """
@@ -663,6 +912,26 @@ class Maze(object):
         return f'Maze(({self._rows}, {self._columns}))'
 
 
+ENTITY_TYPES: dict[str, type[Entity]] = {
+    WATER: Water,
+    HONEY: Honey,
+    APPLE: Apple,
+    COIN: Coin,
+    POTION: Potion,
+}
+
+
+def register_entity(entity_id: str, entity_type: type[Entity]) -> None:
+    """ Registers an entity class so that levels build it wherever entity_id
+        appears in a game file.
+
+    Parameters:
+        entity_id (str): The single character id used in game files
+        entity_type (type): Entity subclass taking a position to construct
+    """
+    ENTITY_TYPES[entity_id] = entity_type
+
+
 class Level(object):
     def __init__(self, dimensions: tuple[int, int]) -> None:
         self._rows = dimensions[0]
@@ -670,62 +939,140 @@ class Level(object):
         self._maze = Maze((self._rows, self._columns))
         self._player_start = None
         self._items = {}
+        self._items_string = None
+        self._coins = 0
+        self._doors_unlocked = False
+        self._items_shared = False
+        # the level this was copied from, kept alive while copies use it
+        self._origin = None
 
     def get_maze(self) -> Maze:
         return self._maze
 
+    def copy(self) -> Level:
+        """ Makes a copy of the level that can be played independently of this
+            one. The maze is copied, with its own doors, and the items are
+            shared until either level changes or hands out its items.
+
+        Returns:
+            A new Level instance in the same state as this level
+        """
+        level = Level((self._rows, self._columns))
+        level._maze = self._maze.copy()
+        level._player_start = self._player_start
+        level._items = self._items
+        level._items_shared = self._items_shared = True
+        level._origin = self if self._origin is None else self._origin
+        level._items_string = self._items_string
+        level._coins = self._coins
+        level._doors_unlocked = self._doors_unlocked
+        return level
+
+    def _own_items(self) -> dict[tuple[int, int], Item]:
+        """ Copies the items first if they are shared with another level, so
+            that they can be changed.
+        """
+        if self._items_shared:
+            self._items = dict(self._items)
+            self._items_shared = False
+        return self._items
+
+    def unlock_door(self, position: Optional[tuple[int, int]] = None) -> None:
+        """ Unlocks the door at position, or every door if not given. """
+        self._maze.unlock_door(position)
+        if position is None:
+            self._doors_unlocked = True
+
     def get_dimensions(self) -> tuple[int, int]:
         return self._rows, self._columns
 
     def attempt_unlock_door(self) -> None:
-        for item in self._items.values():
-            if type(item).__name__ == 'Coin':
-                return
+        """ Unlocks the doors if every coin has been collected. """
+        if self._coins > 0 or self._doors_unlocked:
+            return
 
-        self._maze.unlock_door()
+        self.unlock_door()
         return
 
+    def _place(self, position: tuple[int, int], item: Item) -> None:
+        """ Puts an item at position, keeping count of the coins. """
+        previous = self._items.get(position)
+        if previous is not None and previous.get_id() == COIN:
+            self._coins -= 1
+        if item.get_id() == COIN:
+            self._coins += 1
+        self._own_items()[position] = item
+        self._items_string = None
+
     def remove_item(self, position: tuple[int, int]) -> None:
-        for item in self._items.keys():
-            if item == position:
-                del self._items[item]
-                return
+        if position not in self._items:
+            return
+        item = self._own_items().pop(position)
+        self._items_string = None
+        if item.get_id() == COIN:
+            self._coins -= 1
 
     def add_player_start(self, position: tuple[int, int]) -> None:
         self._player_start = position
         return
 
     def add_entity(self, position: tuple[int, int], entity_id: str) -> None:
-        x = position
-        for i in [Water(x), Honey(x), Apple(x), Coin(x), Potion(x), Player(x)]:
-            if i.get_id() == entity_id:
-                entity = i
-        self._items[x] = entity
+        """ Builds the single entity registered for entity_id and places it at
+            the given position. The player id records the start position.
+
+        Parameters:
+            position (tuple): Position (row, column) of the entity
+            entity_id (str): Id of the entity, PLAYER or a key of ENTITY_TYPES
+        """
+        if entity_id == PLAYER:
+            self.add_player_start(position)
+            return
+
+        entity_type = ENTITY_TYPES.get(entity_id)
+        if entity_type is None:
+            raise ValueError(f'Unknown entity id: {entity_id!r}')
+        self._place(position, entity_type(position))
+
+    def add_entities(self, row_number: int, row: str) -> None:
+        """ Bulk version of add_entity that adds every entity within a row,
+            one entity per cell. The player is recorded as the start position
+            rather than added as an item.
+
+        Parameters:
+            row_number (int): Index of the row within the maze
+            row (str): The row of ids, as read from the game file
+        """
+        entity_types = ENTITY_TYPES
+        for column, entity_id in enumerate(row):
+            if entity_id == PLAYER:
+                self._player_start = (row_number, column)
+                continue
+            entity_type = entity_types.get(entity_id)
+            if entity_type is not None:
+                position = (row_number, column)
+                self._place(position, entity_type(position))
 
     def add_row(self, row: str) -> None:
         self._maze.add_row(row)
-        self._items = {}
 
         # adds items that are not contained within self._maze
-        for row in self._maze.get_ids():
-            for item in row:
-                position = ((self._maze.get_ids().index(row)), row.index(item))
-
-                if item.lower() in ['m', 'a', 'c', 'h']:
-                    self.add_entity(position, item)
-                    self._maze.get_ids()[position[0]][position[1]] = item
-
-                if item.lower() == 'p':
-                    self.add_player_start(position)
+        self.add_entities(len(self._maze.get_ids()) - 1, row)
 
     def get_items(self) -> dict[tuple[int, int], Item]:
-        return self._items
+        """ Getter method for the items by position. Items shared with other
+            copies of the level are copied first, so changing the dict only
+            changes this level.
+        """
+        return self._own_items()
 
     def get_player_start(self) -> Optional[tuple[int, int]]:
         return self._player_start
 
     def __str__(self) -> str:
-        return f'Maze: {(Maze.__str__(self._maze))}\nItems: {self._items}\n' \
+        # the item summary is kept until the items change
+        if self._items_string is None:
+            self._items_string = str(self._items)
+        return f'Maze: {self._maze}\nItems: {self._items_string}\n' \
                f'Player start: {self._player_start}'
 
     def __repr__(self) -> str:
@@ -733,8 +1080,17 @@ class Level(object):
 
 
 class Model(object):
-    def __init__(self, game_file: str) -> None:
-        self._levels = load_game(game_file)
+    def __init__(self, game_file: str,
+                 levels: Optional[list[Level]] = None) -> None:
+        """ Sets up a new game.
+
+        Parameters:
+            game_file (str): The path to the game file
+            levels (list): Already loaded levels of game_file to play instead
+                           of reading the file again
+        """
+        self._game_file = game_file
+        self._levels = load_game(game_file) if levels is None else levels
         self._levels_left = len(self._levels)
         self._levels_completed = 0
         self._player = Player(Model.get_level(self).get_player_start())
@@ -742,6 +1098,7 @@ class Model(object):
         self._lost = False
         self._level_up = False
         self._moves_made = 0
+        self._move_decay = True
 
     def has_won(self) -> bool:
         if self._levels_left == 0:
@@ -762,6 +1119,36 @@ class Model(object):
     def get_level(self) -> None:
         return self._levels[self._levels_completed]
 
+    def get_levels(self) -> list[Level]:
+        return self._levels
+
+    def get_game_file(self) -> str:
+        return self._game_file
+
+    def get_levels_completed(self) -> int:
+        return self._levels_completed
+
+    def get_moves_made(self) -> int:
+        return self._moves_made
+
+    def restore_progress(self, levels_completed: int, moves_made: int) -> None:
+        """ Sets how far through the game the model is, used when restoring a
+            saved game.
+
+        Parameters:
+            levels_completed (int): Number of levels already finished
+            moves_made (int): Number of moves made so far
+        """
+        self._levels_completed = levels_completed
+        self._levels_left = len(self._levels) - levels_completed
+        self._moves_made = moves_made
+
+    def set_move_decay(self, enabled: bool) -> None:
+        """ Sets whether hunger and thirst go up every fifth move. Real-time
+            games turn this off and decay them on a clock instead.
+        """
+        self._move_decay = enabled
+
     def level_up(self) -> bool:
         self._levels_completed += 1
         self._levels_left -= 1
@@ -774,44 +1161,46 @@ class Model(object):
         return self._level_up
 
     def move_player(self, delta: tuple[int, int]) -> None:
-        self._level_up = False
-        position = (self._player.get_position()[0] + delta[0],
-                    self._player.get_position()[1] + delta[1])
-        tile = self.get_level().get_maze().get_tile(position)
+        """ Attempts to move the player by delta. Moving out of the maze from
+            an unlocked door finishes the level, other moves out of the maze or
+            into blocking tiles do nothing.
 
-        if tile.is_blocking() is False:
-            if tile.get_id() == LAVA:
-                self._player.change_health(-5)
-            self._player.set_position(position)
-            self._moves_made += 1
-            self._player.change_health(-1)
-
-        if type(tile).__name__ == 'Door' and tile.is_blocking() is False:
-            self._level_up()
-
-        if (self._moves_made // 5) == 0:
+        Parameters:
+            delta (tuple): The (row, column) change of the move
+        """
+        self._level_up = False
+        maze = self.get_level().get_maze()
+        row, column = self._player.get_position()
+        position = (row + delta[0], column + delta[1])
+        cost = maze.get_cost(position)
+
+        if cost == OUTSIDE_CELL:
+            if maze.is_door((row, column)):
+                self.level_up()
+            return
+        if cost == BLOCKED_CELL:
+            return
+
+        self._player.set_position(position)
+        self._moves_made += 1
+        self._player.change_health(-1 - cost)
+
+        if self._move_decay and self._moves_made % 5 == 0:
             self._player.change_thirst(1)
             self._player.change_hunger(1)
 
         self.attempt_collect_item(position)
 
     def attempt_collect_item(self, position: tuple[int, int]) -> None:
-        
-        if position in self.get_level().get_items():
-            # if the given position contains ann item, the item is added
-            self._player.add_item(self.get_level().get_items()[position])
-            self.get_level().get_maze().get_ids()[position[0]][position[1]] = \
-                ' '
-
-        # this section makes sure that if all coins are collected, door unlocks
-        count_coin = 0
-        for row in self.get_current_maze().get_tiles():
-            for item in row:
-                if type(item).__name__ == "Coin":
-                    count_coin += 1
-
-        if len(self._player.get_inventory().get_items()['Coin']) == count_coin:
-            self.get_level().attemp_unlock_door()
+        """ Picks up the item at position, if there is one, and unlocks the
+            door once no coins are left.
+        """
+        level = self.get_level()
+        item = level.get_items().get(position)
+        if item is not None:
+            self._player.add_item(item)
+            level.remove_item(position)
+        level.attempt_unlock_door()
 
     def get_player(self) -> Player:
         return self._player
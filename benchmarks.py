@@ -0,0 +1,271 @@
+""" Micro benchmarks for the MazeRunner engine.
+
+Run with `python benchmarks.py <name>` or `python benchmarks.py all`.
+"""
+from __future__ import annotations
+import argparse
+import os
+import random
+import time
+from typing import Callable
+
+from a2 import ENTITY_TYPES, OUTSIDE_CELL, Level, Model
+from constants import *
+
+BENCHMARKS: dict[str, Callable[[], None]] = {}
+
+
+def benchmark(function: Callable[[], None]) -> Callable[[], None]:
+    """ Registers a benchmark under its function name without the 'bench_'
+        prefix.
+    """
+    BENCHMARKS[function.__name__.removeprefix('bench_')] = function
+    return function
+
+
+def _best_time(function: Callable[[], object], repeats: int = 5) -> float:
+    """ Returns the fastest of several timed calls to function, in seconds. """
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def item_dense_rows(rows: int, columns: int, density: float,
+                    seed: int = 0) -> list[str]:
+    """ Builds the rows of a walled maze whose inside cells are items with the
+        given probability, with the player in the top left corner.
+    """
+    rng = random.Random(seed)
+    item_ids = list(ENTITY_TYPES)
+    maze = [WALL * columns]
+    for _ in range(rows - 2):
+        inside = ''.join(rng.choice(item_ids) if rng.random() < density
+                         else EMPTY for _ in range(columns - 2))
+        maze.append(WALL + inside + WALL)
+    maze.append(WALL * columns)
+    maze[1] = WALL + PLAYER + maze[1][2:]
+    return maze
+
+
+def corridor_maze_rows(cells: int, seed: int = 0) -> list[str]:
+    """ Builds the rows of a perfect maze of one wide corridors, cells by
+        cells rooms across, by a randomised depth first search, with lava on
+        some corridor cells and the player in the top left corner.
+    """
+    rng = random.Random(seed)
+    size = 2 * cells + 1
+    grid = [[WALL] * size for _ in range(size)]
+    stack = [(0, 0)]
+    visited = {(0, 0)}
+    grid[1][1] = EMPTY
+    while stack:
+        row, column = stack[-1]
+        neighbours = [(row + row_change, column + column_change)
+                      for row_change, column_change in MOVE_DELTAS.values()
+                      if (row + row_change, column + column_change)
+                      not in visited
+                      and 0 <= row + row_change < cells
+                      and 0 <= column + column_change < cells]
+        if not neighbours:
+            stack.pop()
+            continue
+        next_row, next_column = rng.choice(neighbours)
+        visited.add((next_row, next_column))
+        grid[row + next_row + 1][column + next_column + 1] = \
+            LAVA if rng.random() < 0.05 else EMPTY
+        grid[2 * next_row + 1][2 * next_column + 1] = EMPTY
+        stack.append((next_row, next_column))
+    grid[1][1] = PLAYER
+    return [''.join(row) for row in grid]
+
+
+@benchmark
+def bench_entities() -> None:
+    """ Level loading throughput on item-dense mazes. """
+    for size in (20, 100, 300):
+        for density in (0.25, 1.0):
+            rows = item_dense_rows(size, size, density)
+
+            def build() -> Level:
+                level = Level((size, size))
+                for row in rows:
+                    level.add_row(row)
+                return level
+
+            entities = len(build().get_items())
+            seconds = _best_time(build)
+            print(f'{size}x{size} density {density:.2f}: {entities} entities '
+                  f'in {seconds * 1000:.2f} ms '
+                  f'({entities / seconds:,.0f} entities/s)')
+
+
+@benchmark
+def bench_moves() -> None:
+    """ Moves per second through Model.move_player and raw cost lookups. """
+    size = 200
+    rows = item_dense_rows(size, size, 0.0)
+    level = Level((size, size))
+    for row in rows:
+        level.add_row(row)
+
+    rng = random.Random(0)
+    deltas = [rng.choice(list(MOVE_DELTAS.values())) for _ in range(100_000)]
+    model = Model('', [level])
+    player = model.get_player()
+
+    def walk() -> None:
+        for delta in deltas:
+            model.move_player(delta)
+            # keep the player alive so every move does the full amount of work
+            player.change_health(MAX_HEALTH)
+
+    seconds = _best_time(walk)
+    print(f'move_player: {len(deltas) / seconds:,.0f} moves/s')
+
+    maze = level.get_maze()
+    costs = maze.get_cost_table()
+    offsets = list(maze.get_neighbour_offsets().values())
+    start = maze.index_of(player.get_position())
+
+    def lookups() -> None:
+        index = start
+        for offset in offsets * 25_000:
+            if costs[index + offset] < OUTSIDE_CELL:
+                index += offset
+
+    seconds = _best_time(lookups)
+    print(f'cost table: {len(offsets) * 25_000 / seconds:,.0f} moves/s')
+
+
+@benchmark
+def bench_dynamic_entities() -> None:
+    """ Cost per entity of one DynamicEntityManager tick as counts grow. """
+    from dynamic_entities import DynamicEntityManager
+
+    size = 300
+    level = Level((size, size))
+    for row in item_dense_rows(size, size, 0.0):
+        level.add_row(row)
+    rng = random.Random(0)
+    headings = list(MOVE_DELTAS)
+
+    for count in (100, 1_000, 10_000, 100_000):
+        manager = DynamicEntityManager(level)
+        for _ in range(count):
+            position = (rng.randrange(1, size - 1), rng.randrange(1, size - 1))
+            manager.add(position, rng.choice(headings))
+        player = level.get_player_start()
+
+        ticks = max(1, 200_000 // count)
+
+        def run() -> None:
+            for _ in range(ticks):
+                manager.step(player)
+
+        seconds = _best_time(run, repeats=3) / ticks
+        print(f'{count:>7} entities: {seconds * 1000:8.3f} ms/tick, '
+              f'{seconds / count * 1e9:6.1f} ns/entity')
+
+
+@benchmark
+def bench_env() -> None:
+    """ Steps per second of MazeEnv and VectorEnv taking random actions. """
+    from env import ACTIONS, MazeEnv, VectorEnv
+
+    game_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             'games', 'game3.txt')
+    rng = random.Random(0)
+    steps = 20_000
+    actions = [rng.randrange(len(ACTIONS)) for _ in range(steps)]
+
+    env = MazeEnv(game_file)
+
+    def play() -> None:
+        env.reset()
+        for action in actions:
+            if env.step(action)[2]:
+                env.reset()
+
+    seconds = _best_time(play, repeats=3)
+    print(f'MazeEnv: {steps / seconds:,.0f} steps/s')
+
+    for count in (16, 256):
+        vector = VectorEnv(game_file, count)
+        batches = [actions[start:start + count]
+                   for start in range(0, steps, count)]
+
+        def play_vector() -> None:
+            vector.reset()
+            for batch in batches:
+                vector.step(batch)
+
+        seconds = _best_time(play_vector, repeats=3)
+        print(f'VectorEnv x{count}: {len(batches) * count / seconds:,.0f} '
+              f'steps/s')
+
+
+@benchmark
+def bench_maze_graph() -> None:
+    """ Shortest paths on the corridor graph against searching every cell. """
+    import heapq
+    from maze_graph import MazeGraph
+
+    for cells in (25, 100):
+        rows = corridor_maze_rows(cells)
+        level = Level((len(rows), len(rows[0])))
+        for row in rows:
+            level.add_row(row)
+        maze = level.get_maze()
+        costs = maze.get_cost_table()
+        offsets = list(maze.get_neighbour_offsets().values())
+        start = level.get_player_start()
+        goal = (len(rows) - 2, len(rows[0]) - 2)
+
+        def grid_search() -> int:
+            best = {maze.index_of(start): 0}
+            heap = [(0, maze.index_of(start))]
+            target = maze.index_of(goal)
+            while heap:
+                cost, index = heapq.heappop(heap)
+                if index == target:
+                    return cost
+                if cost > best[index]:
+                    continue
+                for offset in offsets:
+                    neighbour = index + offset
+                    if costs[neighbour] < OUTSIDE_CELL:
+                        next_cost = cost + 1 + costs[neighbour]
+                        if next_cost < best.get(neighbour, next_cost + 1):
+                            best[neighbour] = next_cost
+                            heapq.heappush(heap, (next_cost, neighbour))
+            return -1
+
+        build = _best_time(lambda: MazeGraph(level), repeats=3)
+        graph = MazeGraph(level)
+        assert graph.shortest_path(start, goal)[1] == grid_search()
+        grid_seconds = _best_time(grid_search)
+        graph_seconds = _best_time(lambda: graph.shortest_path(start, goal))
+        open_cells = sum(cost < OUTSIDE_CELL for cost in costs)
+        print(f'{len(rows)}x{len(rows)}: {open_cells} cells, {len(graph)} '
+              f'nodes, graph built in {build * 1000:.1f} ms, grid search '
+              f'{grid_seconds * 1000:.2f} ms, graph search '
+              f'{graph_seconds * 1000:.2f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('names', nargs='*', default='all',
+                        choices=['all', *BENCHMARKS])
+    names = parser.parse_args().names
+    # a default is a plain string, so it is not checked as a list of choices
+    names = [names] if isinstance(names, str) else names
+    for name in BENCHMARKS if 'all' in names else names:
+        print(f'== {name} ==')
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main()
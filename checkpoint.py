@@ -0,0 +1,183 @@
+""" Compact binary checkpoints of a game in progress.
+
+A checkpoint holds only a digest of the game file and the state a game can
+change: the level reached, the player's position and stats, inventory counts,
+which of the current level's items remain, which of its doors are unlocked and
+the number of moves made. Restoring rebuilds the game from level data shared
+by every checkpoint of the same game file, so the file is parsed once per
+process.
+"""
+from __future__ import annotations
+import hashlib
+import os
+import struct
+
+from a2 import ENTITY_TYPES, Level, Model, load_game
+from constants import *
+
+MAGIC = b'MZCP'
+VERSION = 1
+
+# magic, version, file digest, levels completed, row, column, health, hunger,
+# thirst, moves made
+_HEADER = struct.Struct('<4sB16sHHHBBBI')
+_COUNT = struct.Struct('<H')
+_INVENTORY_ENTRY = struct.Struct('<cH')
+
+_digests: dict[str, tuple[tuple[int, int], bytes]] = {}
+_pristine_levels: dict[bytes, list[Level]] = {}
+
+
+def file_digest(game_file: str) -> bytes:
+    """ Returns a 16 byte digest of the contents of a game file. The digest is
+        reused while the file's size and modification time are unchanged.
+    """
+    stat = os.stat(game_file)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _digests.get(game_file)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    with open(game_file, 'rb') as file:
+        digest = hashlib.blake2b(file.read(), digest_size=16).digest()
+    _digests[game_file] = (key, digest)
+    return digest
+
+
+def _levels_for(game_file: str, digest: bytes) -> list[Level]:
+    """ Returns the untouched levels of a game file, loading them only the
+        first time they are needed.
+    """
+    levels = _pristine_levels.get(digest)
+    if levels is None:
+        levels = _pristine_levels[digest] = load_game(game_file)
+    return levels
+
+
+def _pack_bits(bits: list[bool]) -> bytes:
+    """ Packs booleans into a count followed by a little endian bitmap. """
+    packed = bytearray((len(bits) + 7) // 8)
+    for index, bit in enumerate(bits):
+        if bit:
+            packed[index >> 3] |= 1 << (index & 7)
+    return _COUNT.pack(len(bits)) + bytes(packed)
+
+
+def _unpack_bits(data: bytes, offset: int) -> tuple[list[bool], int]:
+    """ Reverses _pack_bits, returning the bits and the offset after them. """
+    (count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    bits = [bool(data[offset + (index >> 3)] >> (index & 7) & 1)
+            for index in range(count)]
+    return bits, offset + (count + 7) // 8
+
+
+def save_checkpoint(model: Model) -> bytes:
+    """ Serialises the mutable state of a game.
+
+    Parameters:
+        model (Model): The game to checkpoint
+
+    Returns:
+        The checkpoint as bytes
+    """
+    game_file = model.get_game_file()
+    digest = file_digest(game_file)
+    pristine = _levels_for(game_file, digest)
+    player = model.get_player()
+    row, column = player.get_position()
+    health, hunger, thirst = model.get_player_stats()
+    levels_completed = model.get_levels_completed()
+
+    data = [_HEADER.pack(MAGIC, VERSION, digest, levels_completed, row, column,
+                         health, hunger, thirst, model.get_moves_made())]
+
+    counts = {name: len(items) for name, items
+              in model.get_player_inventory().get_items().items()}
+    entries = [(entity_id, counts[entity_type.__name__])
+               for entity_id, entity_type in ENTITY_TYPES.items()
+               if counts.get(entity_type.__name__)]
+    data.append(_COUNT.pack(len(entries)))
+    for entity_id, count in entries:
+        data.append(_INVENTORY_ENTRY.pack(entity_id.encode('ascii'), count))
+
+    if levels_completed < len(pristine):
+        level = model.get_level()
+        remaining = level.get_items()
+        maze = level.get_maze()
+        data.append(_pack_bits([position in remaining for position
+                                in sorted(pristine[levels_completed]
+                                          .get_items())]))
+        data.append(_pack_bits([not maze.get_tile(position).is_blocking()
+                                for position in maze.get_door_positions()]))
+    return b''.join(data)
+
+
+def restore_checkpoint(data: bytes, game_file: str) -> Model:
+    """ Rebuilds a game from a checkpoint made by save_checkpoint.
+
+    Parameters:
+        data (bytes): The checkpoint
+        game_file (str): The path to the game file the checkpoint was made of
+
+    Returns:
+        A Model in the checkpointed state
+
+    Raises:
+        ValueError: If the data is not a checkpoint of this game file
+    """
+    try:
+        return _restore(data, game_file)
+    except (struct.error, KeyError, IndexError) as error:
+        raise ValueError('Checkpoint is truncated or corrupt') from error
+
+
+def _restore(data: bytes, game_file: str) -> Model:
+    """ Does the work of restore_checkpoint, letting errors from malformed
+        data escape as they are.
+    """
+    (magic, version, digest, levels_completed, row, column, health, hunger,
+     thirst, moves_made) = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError('Not a checkpoint of a supported version')
+    if digest != file_digest(game_file):
+        raise ValueError(f'Checkpoint was not made from {game_file}')
+    offset = _HEADER.size
+
+    pristine = _levels_for(game_file, digest)
+    if levels_completed > len(pristine):
+        raise ValueError('Checkpoint is past the last level of the game')
+    model = Model(game_file, [level.copy() for level in pristine])
+    model.restore_progress(levels_completed, moves_made)
+
+    player = model.get_player()
+    position = (row, column)
+    player.set_position(position)
+    player.change_health(health - MAX_HEALTH)
+    player.change_hunger(hunger)
+    player.change_thirst(thirst)
+
+    (entries,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    for _ in range(entries):
+        entity_id, count = _INVENTORY_ENTRY.unpack_from(data, offset)
+        offset += _INVENTORY_ENTRY.size
+        entity_type = ENTITY_TYPES[entity_id.decode('ascii')]
+        # where a held item was picked up is not kept
+        for _ in range(count):
+            player.add_item(entity_type(position))
+
+    if levels_completed < len(pristine):
+        level = model.get_level()
+        remaining, offset = _unpack_bits(data, offset)
+        for position, keep in zip(sorted(pristine[levels_completed]
+                                         .get_items()), remaining):
+            if not keep:
+                level.remove_item(position)
+        unlocked, offset = _unpack_bits(data, offset)
+        for position, is_unlocked in zip(
+                level.get_maze().get_door_positions(), unlocked):
+            if is_unlocked:
+                level.unlock_door(position)
+    if offset != len(data):
+        raise ValueError('Checkpoint has data after its end')
+    return model
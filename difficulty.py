@@ -0,0 +1,344 @@
+""" Monte Carlo estimates of how difficult each level of a game is.
+
+Agents play each level headlessly through Model.move_player, starting with
+full health and an empty inventory, until they finish it, lose or run out of
+steps. Episodes are run in chunks on a process pool. Every chunk has its own
+seed made from the base seed, level, agent and chunk number, and chunks are
+merged in order, so the estimates depend only on the arguments, not on how
+the work was scheduled. Each level stops getting new chunks once the 95%
+Wilson interval of its win rate is narrow enough.
+
+Usage: python difficulty.py [--agent greedy|random] [--precision P] GAME_FILE
+"""
+from __future__ import annotations
+import argparse
+import math
+import os
+import random
+from collections import Counter, deque
+from itertools import combinations
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Optional
+
+from a2 import OUTSIDE_CELL, Level, Model, load_game
+from constants import *
+
+AGENTS = ('greedy', 'random')
+# stats that can end a game, a loss on several at once is its own outcome,
+# e.g. 'hunger+thirst'
+CAUSES = ('health', 'hunger', 'thirst')
+OUTCOMES = ('won', *('+'.join(causes) for count in range(1, len(CAUSES) + 1)
+                     for causes in combinations(CAUSES, count)), 'timeout')
+_DELTAS = list(MOVE_DELTAS.values())
+# z score of a 95% confidence interval
+_Z = 1.96
+
+
+class LevelDifficulty(object):
+    """ Running totals of the episodes played on one level by one agent. """
+
+    def __init__(self, level: int, agent: str) -> None:
+        self._level = level
+        self._agent = agent
+        self._outcomes = Counter()
+        self._winning_moves = 0
+
+    def add_episode(self, outcome: str, moves: int) -> None:
+        self._outcomes[outcome] += 1
+        if outcome == 'won':
+            self._winning_moves += moves
+
+    def merge(self, other: LevelDifficulty) -> None:
+        """ Adds the episodes of other to these totals. """
+        self._outcomes.update(other._outcomes)
+        self._winning_moves += other._winning_moves
+
+    def get_level(self) -> int:
+        return self._level
+
+    def get_agent(self) -> str:
+        return self._agent
+
+    def get_episodes(self) -> int:
+        return sum(self._outcomes.values())
+
+    def get_outcomes(self) -> dict[str, int]:
+        """ Returns how many episodes ended in each of OUTCOMES. """
+        return {outcome: self._outcomes[outcome] for outcome in OUTCOMES}
+
+    def win_rate(self) -> float:
+        episodes = self.get_episodes()
+        return self._outcomes['won'] / episodes if episodes else 0.0
+
+    def interval(self) -> tuple[float, float]:
+        """ Returns the 95% Wilson score interval of the win rate. """
+        episodes = self.get_episodes()
+        if episodes == 0:
+            return 0.0, 1.0
+        rate = self.win_rate()
+        scale = 1 + _Z * _Z / episodes
+        centre = (rate + _Z * _Z / (2 * episodes)) / scale
+        spread = _Z * math.sqrt(rate * (1 - rate) / episodes
+                                + _Z * _Z / (4 * episodes * episodes)) / scale
+        return max(0.0, centre - spread), min(1.0, centre + spread)
+
+    def mean_moves(self) -> Optional[float]:
+        """ Returns the mean moves made in won episodes, if there were any. """
+        wins = self._outcomes['won']
+        return self._winning_moves / wins if wins else None
+
+    def __str__(self) -> str:
+        low, high = self.interval()
+        moves = self.mean_moves()
+        losses = ', '.join(f'{outcome}: {count}' for outcome, count
+                           in self.get_outcomes().items()
+                           if outcome != 'won' and count)
+        return (f'Level {self._level + 1} ({self._agent}): win rate '
+                f'{self.win_rate():.3f} [{low:.3f}, {high:.3f}] over '
+                f'{self.get_episodes()} episodes, mean moves '
+                f'{"-" if moves is None else f"{moves:.1f}"}'
+                f'{f", losses {losses}" if losses else ""}')
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._level}, {self._agent!r})'
+
+
+def _loss_cause(model: Model) -> str:
+    """ Returns the outcome of a lost game, naming every stat at its limit. """
+    health, hunger, thirst = model.get_player_stats()
+    limits = (health <= 0, hunger >= MAX_HUNGER, thirst >= MAX_THIRST)
+    return '+'.join(cause for cause, reached in zip(CAUSES, limits)
+                    if reached)
+
+
+def _use_item(model: Model, name: str) -> bool:
+    """ Uses an item from the player's inventory, if they have one. """
+    item = model.get_player_inventory().remove_item(name)
+    if item is None:
+        return False
+    item.apply(model.get_player())
+    return True
+
+
+def _exit_delta(model: Model) -> Optional[tuple[int, int]]:
+    """ Returns the move that finishes the level from the player's position,
+        if there is one.
+    """
+    maze = model.get_current_maze()
+    row, column = model.get_player().get_position()
+    if not maze.is_door((row, column)):
+        return None
+    for delta in _DELTAS:
+        if maze.get_cost((row + delta[0], column + delta[1])) == OUTSIDE_CELL:
+            return delta
+    return None
+
+
+def _path_to_target(model: Model, rng: random.Random) -> list[tuple[int, int]]:
+    """ Breadth first search from the player to the nearest remaining coin,
+        or to the door once the coins are gone, breaking ties at random.
+
+    Returns:
+        The moves to make, empty if no target can be reached
+    """
+    level = model.get_level()
+    maze = level.get_maze()
+    costs = maze.get_cost_table()
+    offsets = list(maze.get_neighbour_offsets().items())
+    coins = [position for position, item in level.get_items().items()
+             if item.get_id() == COIN]
+    targets = {maze.index_of(position)
+               for position in coins or maze.get_door_positions()}
+
+    start = maze.index_of(model.get_player().get_position())
+    came_from = {start: None}
+    queue = deque([start])
+    while queue:
+        index = queue.popleft()
+        if index in targets:
+            path = []
+            while came_from[index] is not None:
+                index, delta = came_from[index]
+                path.append(delta)
+            path.reverse()
+            return path
+        rng.shuffle(offsets)
+        for delta, offset in offsets:
+            neighbour = index + offset
+            if neighbour not in came_from and costs[neighbour] < OUTSIDE_CELL:
+                came_from[neighbour] = (index, delta)
+                queue.append(neighbour)
+    return []
+
+
+def _greedy_agent(noise: float = 0.1) -> Callable[[Model, random.Random],
+                                                  tuple[int, int]]:
+    """ Makes an agent that heads for the nearest coin and then the door,
+        using items when a stat is about to run out, and making a random move
+        with probability noise.
+    """
+    path = []
+
+    def act(model: Model, rng: random.Random) -> tuple[int, int]:
+        health, hunger, thirst = model.get_player_stats()
+        if health <= LAVA_DAMAGE + 1:
+            _use_item(model, 'Potion')
+        if hunger >= MAX_HUNGER - 1:
+            _use_item(model, 'Honey') or _use_item(model, 'Apple')
+        if thirst >= MAX_THIRST - 1:
+            _use_item(model, 'Water')
+
+        exit_delta = _exit_delta(model)
+        if exit_delta is not None:
+            return exit_delta
+        if rng.random() < noise:
+            path.clear()
+            return rng.choice(_DELTAS)
+        if not path:
+            path.extend(reversed(_path_to_target(model, rng)))
+        return path.pop() if path else rng.choice(_DELTAS)
+
+    return act
+
+
+def _random_agent() -> Callable[[Model, random.Random], tuple[int, int]]:
+    """ Makes an agent that moves at random. """
+    return lambda model, rng: rng.choice(_DELTAS)
+
+
+def play_episode(level: Level, agent: str, rng: random.Random,
+                 max_steps: int) -> tuple[str, int]:
+    """ Plays one episode on a copy of level.
+
+    Returns:
+        (outcome, moves made), where outcome is one of OUTCOMES
+    """
+    model = Model('', [level.copy()])
+    act = _greedy_agent() if agent == 'greedy' else _random_agent()
+    for _ in range(max_steps):
+        model.move_player(act(model, rng))
+        if model.did_level_up():
+            return 'won', model.get_moves_made()
+        if model.has_lost():
+            return _loss_cause(model), model.get_moves_made()
+    return 'timeout', model.get_moves_made()
+
+
+# levels loaded by this worker process, by game file
+_worker_levels: dict[str, list[Level]] = {}
+
+
+def _run_chunk(game_file: str, level_index: int, agent: str, seed: int,
+               chunk: int, episodes: int) -> tuple[int, LevelDifficulty]:
+    """ Worker entry point, plays a chunk of episodes on one level. """
+    levels = _worker_levels.get(game_file)
+    if levels is None:
+        levels = _worker_levels[game_file] = load_game(game_file)
+    level = levels[level_index]
+    rows, columns = level.get_dimensions()
+    rng = random.Random(f'{seed}:{level_index}:{agent}:{chunk}')
+
+    result = LevelDifficulty(level_index, agent)
+    for _ in range(episodes):
+        result.add_episode(*play_episode(level, agent, rng,
+                                         max_steps=4 * rows * columns))
+    return chunk, result
+
+
+def estimate_difficulty(game_file: str, agent: str = 'greedy',
+                        precision: float = 0.02, chunk_size: int = 100,
+                        max_episodes: int = 50_000, seed: int = 0,
+                        workers: Optional[int] = None,
+                        on_update: Optional[Callable[[LevelDifficulty],
+                                                     None]] = None
+                        ) -> list[LevelDifficulty]:
+    """ Estimates the difficulty of every level of a game.
+
+    Parameters:
+        game_file: The path to the game file
+        agent: One of AGENTS
+        precision: Largest half width of the win rate interval to stop at
+        chunk_size: Episodes played per task sent to a worker
+        max_episodes: Most episodes played on any level
+        seed: Base seed of every chunk
+        workers: Number of worker processes, defaults to the CPU count
+        on_update: Called with a level's totals whenever they change
+
+    Returns:
+        The totals for each level, in order
+    """
+    if agent not in AGENTS:
+        raise ValueError(f'Unknown agent: {agent!r}')
+    level_count = len(load_game(game_file))
+    results = [LevelDifficulty(level, agent) for level in range(level_count)]
+    # chunks finished out of order wait here until the ones before them finish
+    finished = [{} for _ in range(level_count)]
+    merged = [0] * level_count
+    scheduled = [0] * level_count
+    max_chunks = math.ceil(max_episodes / chunk_size)
+    workers = workers or os.cpu_count() or 1
+    # chunks kept in flight per level, enough to keep every worker busy
+    ahead = max(2, 2 * workers // level_count)
+
+    def precise_enough(level: int) -> bool:
+        low, high = results[level].interval()
+        return (high - low) / 2 <= precision or merged[level] >= max_chunks
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+
+        def schedule(level: int) -> None:
+            while (scheduled[level] - merged[level] < ahead
+                   and scheduled[level] < max_chunks):
+                pending.add(pool.submit(_run_chunk, game_file, level, agent,
+                                        seed, scheduled[level], chunk_size))
+                scheduled[level] += 1
+
+        for level in range(level_count):
+            schedule(level)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk, result = future.result()
+                level = result.get_level()
+                if precise_enough(level):
+                    continue
+                finished[level][chunk] = result
+                while merged[level] in finished[level] \
+                        and not precise_enough(level):
+                    results[level].merge(finished[level].pop(merged[level]))
+                    merged[level] += 1
+                    if on_update is not None:
+                        on_update(results[level])
+                if not precise_enough(level):
+                    schedule(level)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('game_file')
+    parser.add_argument('--agent', choices=AGENTS, default='greedy')
+    parser.add_argument('--precision', type=float, default=0.02,
+                        help='half width of the win rate interval to reach')
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--max-episodes', type=int, default=50_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--quiet', action='store_true',
+                        help='only print the final estimates')
+    arguments = parser.parse_args()
+
+    results = estimate_difficulty(
+        arguments.game_file, arguments.agent, arguments.precision,
+        arguments.chunk_size, arguments.max_episodes, arguments.seed,
+        arguments.workers, None if arguments.quiet
+        else lambda result: print(result, flush=True))
+    print('---------------')
+    ranked = sorted(results, key=lambda result: result.win_rate())
+    for result in ranked:
+        print(result)
+
+
+if __name__ == '__main__':
+    main()
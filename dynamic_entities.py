@@ -0,0 +1,186 @@
+""" Struct-of-arrays storage for large numbers of moving entities.
+
+Instead of one DynamicEntity object per hazard or NPC, a
+DynamicEntityManager keeps every entity's cell and heading in flat arrays and
+moves all of them in one pass per game tick, checking the maze's cost table and
+the player's cell for the whole batch at once. With NumPy installed the pass
+is vectorised over views of the same arrays, else it is a plain loop.
+"""
+from __future__ import annotations
+from array import array
+from typing import Iterable, Optional
+
+from a2 import DynamicEntity, Level, OUTSIDE_CELL
+from constants import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# headings, in the order of MOVE_DELTAS
+HEADINGS = list(MOVE_DELTAS.values())
+_REVERSE = [HEADINGS.index((-row, -column)) for row, column in HEADINGS]
+
+
+class DynamicEntityManager(object):
+    """ Moves every dynamic entity of a level together. Each entity walks in a
+        straight line and turns back when the next cell is blocking.
+
+        Entities are referred to by the handle returned from add, which stays
+        valid after other entities are removed. The arrays only hold live
+        entities: removing one moves the last entity into its slot, so dead
+        entities never cost time in step or collisions.
+    """
+
+    def __init__(self, level: Level) -> None:
+        """ Sets up an empty manager for the entities of a level.
+
+        Parameters:
+            level (Level): The level the entities move within
+        """
+        self._level = level
+        self._indices = array('l')
+        self._headings = array('b')
+        # handle of the entity in each slot, and the slot of each handle
+        self._handles = array('l')
+        self._slots: dict[int, int] = {}
+        self._next_handle = 0
+
+    def add(self, position: tuple[int, int], heading: str = RIGHT) -> int:
+        """ Adds an entity.
+
+        Parameters:
+            position (tuple): Starting position (row, column) of the entity
+            heading (str): The move key the entity starts walking in
+
+        Returns:
+            The handle of the new entity
+
+        Raises:
+            ValueError: If position is outside the maze or blocking
+        """
+        maze = self._level.get_maze()
+        if maze.get_cost(position) >= OUTSIDE_CELL:
+            raise ValueError(f'{position} is outside the maze or blocking')
+        handle = self._next_handle
+        self._next_handle += 1
+        self._slots[handle] = len(self._indices)
+        self._indices.append(maze.index_of(position))
+        self._headings.append(HEADINGS.index(MOVE_DELTAS[heading]))
+        self._handles.append(handle)
+        return handle
+
+    def add_entities(self, entities: Iterable[DynamicEntity],
+                     heading: str = RIGHT) -> list[int]:
+        """ Adds the position of every entity, all walking in heading.
+
+        Returns:
+            The handles of the new entities, in order
+        """
+        return [self.add(entity.get_position(), heading)
+                for entity in entities]
+
+    def remove(self, handle: int) -> None:
+        """ Removes an entity, it no longer moves or collides. """
+        slot = self._slots.pop(handle, None)
+        if slot is None:
+            return
+        last = len(self._indices) - 1
+        if slot != last:
+            moved = self._handles[last]
+            self._indices[slot] = self._indices[last]
+            self._headings[slot] = self._headings[last]
+            self._handles[slot] = moved
+            self._slots[moved] = slot
+        self._indices.pop()
+        self._headings.pop()
+        self._handles.pop()
+
+    def get_position(self, handle: int) -> tuple[int, int]:
+        """ Getter method for the current position of an entity. """
+        return self._level.get_maze().position_of(
+            self._indices[self._slots[handle]])
+
+    def get_positions(self) -> dict[int, tuple[int, int]]:
+        """ Maps the handle of every entity to its current position. """
+        position_of = self._level.get_maze().position_of
+        return {handle: position_of(index)
+                for handle, index in zip(self._handles, self._indices)}
+
+    def to_entities(self) -> dict[int, DynamicEntity]:
+        """ Builds a DynamicEntity for every entity, for code that needs the
+            object form. Changes to them are not copied back.
+        """
+        return {handle: DynamicEntity(position)
+                for handle, position in self.get_positions().items()}
+
+    def step(self, player_position: Optional[tuple[int, int]] = None
+             ) -> list[int]:
+        """ Moves every entity one cell, or turns it around if the cell ahead
+            is blocking or outside the maze.
+
+        Parameters:
+            player_position (tuple): Position of the player to check for
+                                     collisions, if any
+
+        Returns:
+            The handles of the entities on the player's cell after the move
+        """
+        maze = self._level.get_maze()
+        offsets = [maze.get_neighbour_offsets()[heading]
+                   for heading in HEADINGS]
+        if numpy is not None:
+            self._step_arrays(maze.get_cost_table(), offsets)
+        else:
+            self._step_loop(maze.get_cost_table(), offsets)
+
+        if player_position is None:
+            return []
+        return self.collisions(player_position)
+
+    def _step_loop(self, costs: bytearray, offsets: list[int]) -> None:
+        reverse = _REVERSE
+        indices = self._indices
+        headings = self._headings
+
+        for slot, index in enumerate(indices):
+            heading = headings[slot]
+            target = index + offsets[heading]
+            if costs[target] >= OUTSIDE_CELL:
+                headings[slot] = reverse[heading]
+            else:
+                indices[slot] = target
+
+    def _step_arrays(self, costs: bytearray, offsets: list[int]) -> None:
+        """ The same as _step_loop, on NumPy views that write straight back to
+            the arrays.
+        """
+        if not self._indices:
+            return
+        indices = numpy.frombuffer(self._indices,
+                                   dtype=f'i{self._indices.itemsize}')
+        headings = numpy.frombuffer(self._headings, dtype=numpy.int8)
+
+        targets = indices + numpy.array(offsets)[headings]
+        blocked = numpy.frombuffer(costs, dtype=numpy.uint8)[targets] \
+            >= OUTSIDE_CELL
+        headings[blocked] = numpy.array(_REVERSE, dtype=numpy.int8)[
+            headings[blocked]]
+        indices[~blocked] = targets[~blocked]
+
+    def collisions(self, position: tuple[int, int]) -> list[int]:
+        """ Returns the handles of the entities at a position. """
+        index = self._level.get_maze().index_of(position)
+        # count runs in C, so the common case of no collision stays cheap
+        if self._indices.count(index) == 0:
+            return []
+        return sorted(handle for handle, entity_index
+                      in zip(self._handles, self._indices)
+                      if entity_index == index)
+
+    def __len__(self) -> int:
+        return len(self._indices)
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._level!r})'
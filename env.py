@@ -0,0 +1,375 @@
+""" A reinforcement learning environment for MazeRunner games.
+
+MazeEnv plays a game file through Model with a reset/step interface in the
+style of gym, and VectorEnv steps several of them together. Observations are
+written in place into buffers allocated once, and returned as views of them:
+NumPy arrays if NumPy is installed, else memoryviews of the same shape. The
+views are overwritten by the next step or reset, so copy them to keep them.
+
+Each observation holds
+    tiles: (rows, columns) uint8 tile codes, see TILE_CODES
+    items: (len(ITEM_LAYERS), rows, columns) uint8, 1 where that item lies
+    player: (2 + 3 + len(ITEM_LAYERS),) int16 of the player's row, column,
+            health, hunger, thirst and how many of each item they hold
+Rows and columns are the largest of any level in the game, cells outside a
+smaller level read as walls.
+
+Resets copy levels loaded once per environment rather than reading the game
+file again, and tiles are only redrawn when a door unlocks or a level ends.
+"""
+from __future__ import annotations
+from array import array
+from typing import Optional, Sequence
+
+from a2 import BLOCKED_CELL, ENTITY_TYPES, Level, Model, load_game
+from constants import *
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# tile codes, unknown characters read as empty
+TILE_CODES = {EMPTY: 0, WALL: 1, LAVA: 2, DOOR: 3}
+UNLOCKED_DOOR = 4
+# entities registered after env is imported have no layer and are not observed
+ITEM_LAYERS = tuple(ENTITY_TYPES)
+_LAYER_OF = {item_id: layer for layer, item_id in enumerate(ITEM_LAYERS)}
+_ITEM_NAMES = tuple(ENTITY_TYPES[item_id].__name__ for item_id in ITEM_LAYERS)
+PLAYER_FIELDS = 5 + len(ITEM_LAYERS)
+
+# actions are the moves of MOVE_DELTAS then using each usable item
+USABLE = (POTION, APPLE, HONEY, WATER)
+ACTIONS = (*MOVE_DELTAS, *(ENTITY_TYPES[item_id].__name__
+                           for item_id in USABLE))
+_DELTAS = tuple(MOVE_DELTAS.values())
+
+LEVEL_REWARD = 1.0
+LOSS_REWARD = -1.0
+
+_CODE_TABLE = bytearray(256)
+for _character, _code in TILE_CODES.items():
+    _CODE_TABLE[ord(_character)] = _code
+_CODE_TABLE = bytes(_CODE_TABLE)
+
+
+def _view(buffer, format: str, start: int, length: int,
+          shape: tuple[int, ...]) -> memoryview:
+    """ Returns a view of length items of buffer from start, with the given
+        item format and shape.
+    """
+    view = memoryview(buffer)[start:start + length]
+    return view.cast('B').cast(format, shape)
+
+
+def _as_array(view: memoryview):
+    """ Wraps a view as a NumPy array sharing its memory, if NumPy is
+        installed.
+    """
+    return view if numpy is None else numpy.asarray(view)
+
+
+class ObservationBuffers(object):
+    """ Preallocated observations for a number of environments, laid out so
+        that the observation of every environment together is one contiguous
+        block per field.
+    """
+
+    def __init__(self, count: int, dimensions: tuple[int, int]) -> None:
+        """ Allocates the buffers.
+
+        Parameters:
+            count (int): Number of environments
+            dimensions (tuple): The (rows, columns) of every observation
+        """
+        self._count = count
+        self._rows, self._columns = dimensions
+        cells = self._rows * self._columns
+        self._cells = cells
+        self.tiles = bytearray(count * cells)
+        self.items = bytearray(count * len(ITEM_LAYERS) * cells)
+        self.player = array('h', bytes(2 * count * PLAYER_FIELDS))
+
+    def get_count(self) -> int:
+        return self._count
+
+    def get_dimensions(self) -> tuple[int, int]:
+        return self._rows, self._columns
+
+    def slot(self, index: int) -> tuple[memoryview, memoryview, memoryview]:
+        """ Returns flat writable views of the tiles, items and player fields
+            of one environment.
+        """
+        cells = self._cells
+        items = len(ITEM_LAYERS) * cells
+        return (memoryview(self.tiles)[index * cells:(index + 1) * cells],
+                memoryview(self.items)[index * items:(index + 1) * items],
+                memoryview(self.player)[index * PLAYER_FIELDS:
+                                        (index + 1) * PLAYER_FIELDS])
+
+    def observation(self, index: Optional[int] = None) -> dict[str, object]:
+        """ Returns shaped views of the observation of one environment, or of
+            every environment stacked if index is None.
+        """
+        first, count = (0, self._count) if index is None else (index, 1)
+        stack = (count,) if index is None else ()
+        shape = (self._rows, self._columns)
+        items = len(ITEM_LAYERS) * self._cells
+        return {
+            'tiles': _as_array(_view(self.tiles, 'B', first * self._cells,
+                                     count * self._cells, (*stack, *shape))),
+            'items': _as_array(_view(self.items, 'B', first * items,
+                                     count * items,
+                                     (*stack, len(ITEM_LAYERS), *shape))),
+            'player': _as_array(_view(self.player, 'h', first * PLAYER_FIELDS,
+                                      count * PLAYER_FIELDS,
+                                      (*stack, PLAYER_FIELDS))),
+        }
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}({self._count}, '
+                f'({self._rows}, {self._columns}))')
+
+
+def game_dimensions(levels: Sequence[Level]) -> tuple[int, int]:
+    """ Returns the largest rows and columns of any of the levels. """
+    return (max(level.get_dimensions()[0] for level in levels),
+            max(level.get_dimensions()[1] for level in levels))
+
+
+class MazeEnv(object):
+    """ One game of MazeRunner played one action at a time. An episode ends
+        when the game is won or lost, or is cut short after max_steps.
+    """
+
+    def __init__(self, game_file: str, levels: Optional[list[Level]] = None,
+                 max_steps: int = 1000,
+                 buffers: Optional[ObservationBuffers] = None,
+                 slot: int = 0) -> None:
+        """ Sets up the environment, call reset before the first step.
+
+        Parameters:
+            game_file (str): The path to the game file
+            levels (list): Already loaded levels of game_file, left untouched
+            max_steps (int): Steps after which an episode is cut short
+            buffers (ObservationBuffers): Buffers to write observations into,
+                                          allocated if not given
+            slot (int): Which of the buffers' environments this is
+        """
+        self._game_file = game_file
+        self._pristine = load_game(game_file) if levels is None else levels
+        self._max_steps = max_steps
+        if buffers is None:
+            buffers = ObservationBuffers(1, game_dimensions(self._pristine))
+        self._buffers = buffers
+        self._slot = slot
+        self._tiles, self._items, self._player = buffers.slot(slot)
+        self._rows, self._columns = buffers.get_dimensions()
+        self._item_templates = [self._item_layers(level)
+                                for level in self._pristine]
+
+        self._model = None
+        self._steps = 0
+        self._level_index = -1
+        self._maze = None
+        self._revision = -1
+
+    def _item_layers(self, level: Level) -> bytes:
+        """ Builds the item layers of a level that has not been played. """
+        cells = self._rows * self._columns
+        layers = bytearray(len(ITEM_LAYERS) * cells)
+        for (row, column), item in level.get_items().items():
+            layer = _LAYER_OF.get(item.get_id())
+            if layer is not None:
+                layers[layer * cells + row * self._columns + column] = 1
+        return bytes(layers)
+
+    def get_model(self) -> Optional[Model]:
+        """ Getter method for the game being played, None before reset. """
+        return self._model
+
+    def observation(self) -> dict[str, object]:
+        """ Returns views of the current observation, see the module docs. """
+        return self._buffers.observation(self._slot)
+
+    def reset(self) -> tuple[dict[str, object], dict[str, int]]:
+        """ Starts a new game from the first level.
+
+        Returns:
+            (observation, info)
+        """
+        self._model = Model(self._game_file,
+                            [level.copy() for level in self._pristine])
+        self._steps = 0
+        self._player[5:] = array('h', bytes(2 * len(ITEM_LAYERS)))
+        # the last episode may have ended on the first level, so redraw it
+        self._level_index = -1
+        self._maze = None
+        self._write()
+        return self.observation(), self._info()
+
+    def _info(self) -> dict[str, int]:
+        return {'levels_completed': self._model.get_levels_completed(),
+                'moves_made': self._model.get_moves_made(),
+                'steps': self._steps}
+
+    def _write(self) -> None:
+        """ Writes the observation, redrawing the level if it has changed. """
+        model = self._model
+        if model.get_levels_completed() != self._level_index:
+            self._level_index = model.get_levels_completed()
+            self._maze = None
+            if self._level_index < len(self._pristine):
+                self._items[:] = self._item_templates[self._level_index]
+
+        if self._level_index < len(self._pristine):
+            maze = model.get_current_maze()
+            if maze is not self._maze or maze.get_revision() != self._revision:
+                self._draw_tiles(maze)
+
+        player = self._player
+        player[0], player[1] = model.get_player().get_position()
+        player[2], player[3], player[4] = model.get_player_stats()
+
+    def _draw_tiles(self, maze) -> None:
+        """ Writes the tile codes of a maze, padding it with walls. """
+        self._maze = maze
+        self._revision = maze.get_revision()
+        columns = self._columns
+        rows, level_columns = maze.get_dimensions()
+        tiles = self._tiles
+        tiles[:] = bytes([TILE_CODES[WALL]]) * len(tiles)
+        for row, line in enumerate(str(maze).split('\n')[:rows]):
+            codes = line[:level_columns].encode('latin-1', 'replace') \
+                .translate(_CODE_TABLE)
+            tiles[row * columns:row * columns + len(codes)] = codes
+        costs = maze.get_cost_table()
+        for row, column in maze.get_door_positions():
+            if costs[maze.index_of((row, column))] < BLOCKED_CELL:
+                tiles[row * columns + column] = UNLOCKED_DOOR
+
+    def _act(self, action: int) -> tuple[float, bool, bool]:
+        """ Takes an action and writes the observation, without building the
+            views that step returns.
+
+        Returns:
+            (reward, terminated, truncated)
+        """
+        model = self._model
+        self._steps += 1
+        if action < len(_DELTAS):
+            delta = _DELTAS[action]
+            row, column = model.get_player().get_position()
+            target = (row + delta[0], column + delta[1])
+            item = model.get_level().get_items().get(target)
+            moves = model.get_moves_made()
+            model.move_player(delta)
+            layer = None if item is None else _LAYER_OF.get(item.get_id())
+            if layer is not None and model.get_moves_made() != moves:
+                self._items[layer * self._rows * self._columns
+                            + target[0] * self._columns + target[1]] = 0
+                self._player[5 + layer] += 1
+        else:
+            layer = _LAYER_OF[USABLE[action - len(_DELTAS)]]
+            item = model.get_player_inventory().remove_item(_ITEM_NAMES[layer])
+            if item is not None:
+                item.apply(model.get_player())
+                self._player[5 + layer] -= 1
+
+        reward = 0.0
+        if model.did_level_up():
+            reward = LEVEL_REWARD
+        terminated = model.has_won() or model.has_lost()
+        if model.has_lost():
+            reward = LOSS_REWARD
+        self._write()
+        return reward, terminated, not terminated \
+            and self._steps >= self._max_steps
+
+    def step(self, action: int) -> tuple[dict[str, object], float, bool, bool,
+                                         dict[str, int]]:
+        """ Takes one action, an index into ACTIONS.
+
+        Returns:
+            (observation, reward, terminated, truncated, info)
+        """
+        reward, terminated, truncated = self._act(action)
+        return self.observation(), reward, terminated, truncated, self._info()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._game_file!r})'
+
+
+class VectorEnv(object):
+    """ Several MazeEnvs of the same game stepped together, writing their
+        observations into one set of buffers. An environment whose episode
+        ends is reset straight away, and its info holds the final info of
+        the episode under 'final'.
+    """
+
+    def __init__(self, game_file: str, count: int,
+                 max_steps: int = 1000) -> None:
+        """ Sets up count environments, loading the game file once.
+
+        Parameters:
+            game_file (str): The path to the game file
+            count (int): Number of environments
+            max_steps (int): Steps after which an episode is cut short
+        """
+        levels = load_game(game_file)
+        self._buffers = ObservationBuffers(count, game_dimensions(levels))
+        self._envs = [MazeEnv(game_file, levels, max_steps, self._buffers, slot)
+                      for slot in range(count)]
+        self._rewards = array('f', bytes(4 * count))
+        self._terminated = bytearray(count)
+        self._truncated = bytearray(count)
+
+    def get_envs(self) -> list[MazeEnv]:
+        return self._envs
+
+    def observation(self) -> dict[str, object]:
+        """ Returns views of every observation stacked, see the module docs.
+        """
+        return self._buffers.observation()
+
+    def reset(self) -> tuple[dict[str, object], list[dict[str, int]]]:
+        """ Starts a new game in every environment.
+
+        Returns:
+            (observations, infos)
+        """
+        infos = [env.reset()[1] for env in self._envs]
+        return self.observation(), infos
+
+    def step(self, actions: Sequence[int]) -> tuple[dict[str, object], object,
+                                                    object, object,
+                                                    list[dict[str, int]]]:
+        """ Takes one action in every environment.
+
+        Parameters:
+            actions (sequence): An index into ACTIONS for each environment
+
+        Returns:
+            (observations, rewards, terminated, truncated, infos), where the
+            rewards are float32 and the flags uint8, one per environment
+        """
+        infos = []
+        for slot, (env, action) in enumerate(zip(self._envs, actions)):
+            reward, terminated, truncated = env._act(int(action))
+            self._rewards[slot] = reward
+            self._terminated[slot] = terminated
+            self._truncated[slot] = truncated
+            info = env._info()
+            if terminated or truncated:
+                info = {**env.reset()[1], 'final': info}
+            infos.append(info)
+        return (self.observation(), _as_array(memoryview(self._rewards)),
+                _as_array(memoryview(self._terminated)),
+                _as_array(memoryview(self._truncated)), infos)
+
+    def __len__(self) -> int:
+        return len(self._envs)
+
+    def __repr__(self) -> str:
+        game_file = self._envs[0]._game_file if self._envs else ''
+        return f'{type(self).__name__}({game_file!r}, {len(self._envs)})'
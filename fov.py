@@ -0,0 +1,206 @@
+""" Field of view and fog of war.
+
+Line of sight is found by recursive shadowcasting over each of the eight
+octants around the viewer, reading opacity straight from the maze's cost
+table, so blocking tiles (walls and locked doors) block sight. Results are
+cached per maze for each (position, radius), and the cache is dropped when the
+maze changes. Copies of an interned maze that still match it use the cache of
+the interned maze, so every game playing the same level shares one cache.
+"""
+from __future__ import annotations
+from typing import Optional
+from weakref import WeakKeyDictionary
+
+from a2 import OUTSIDE_CELL, Item, Maze
+from a2_support import TextInterface
+from constants import *
+
+DEFAULT_RADIUS = 6
+# cached views kept per maze before the cache is emptied
+MAX_CACHED_VIEWS = 4096
+
+# multipliers turning (column, row) within octant 0 into each octant
+_OCTANTS = ((1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+            (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1))
+
+
+class FieldOfView(object):
+    """ Works out which cells of a maze can be seen from a position. """
+
+    def __init__(self, maze: Maze) -> None:
+        self._maze = maze
+        self._revision = maze.get_revision()
+        self._views: dict[tuple[tuple[int, int], int],
+                          frozenset[tuple[int, int]]] = {}
+
+    def visible(self, position: tuple[int, int],
+                radius: int = DEFAULT_RADIUS) -> frozenset[tuple[int, int]]:
+        """ Returns the positions that can be seen from position, including
+            position itself and the blocking tiles that block the view.
+
+        Parameters:
+            position (tuple): The (row, column) of the viewer
+            radius (int): How far the viewer can see
+        """
+        if self._maze.get_revision() != self._revision:
+            self._revision = self._maze.get_revision()
+            self._views.clear()
+
+        key = (position, radius)
+        view = self._views.get(key)
+        if view is None:
+            if len(self._views) >= MAX_CACHED_VIEWS:
+                self._views.clear()
+            view = self._views[key] = self._compute(position, radius)
+        return view
+
+    def _compute(self, position: tuple[int, int],
+                 radius: int) -> frozenset[tuple[int, int]]:
+        rows, columns = self._maze.get_dimensions()
+        seen = {position}
+        for octant in _OCTANTS:
+            self._cast(seen, position, 1, 1.0, 0.0, radius, octant)
+        return frozenset((row, column) for row, column in seen
+                         if 0 <= row < rows and 0 <= column < columns)
+
+    def _opaque(self, row: int, column: int) -> bool:
+        """ Checks if a cell blocks sight, anything outside the maze does. """
+        return self._maze.get_cost((row, column)) >= OUTSIDE_CELL
+
+    def _cast(self, seen: set[tuple[int, int]], origin: tuple[int, int],
+              distance: int, start: float, end: float, radius: int,
+              octant: tuple[int, int, int, int]) -> None:
+        """ Lights the cells of one octant between the start and end slopes,
+            from distance outwards, recursing around each run of opaque cells.
+        """
+        if start < end:
+            return
+        origin_row, origin_column = origin
+        column_x, column_y, row_x, row_y = octant
+        radius_squared = radius * radius
+        next_start = start
+
+        for depth in range(distance, radius + 1):
+            blocked = False
+            for offset in range(-depth, 1):
+                # slopes of the cell's left and right edges
+                left = (offset - 0.5) / (-depth + 0.5)
+                right = (offset + 0.5) / (-depth - 0.5)
+                if start < right:
+                    continue
+                if end > left:
+                    break
+
+                row = origin_row + offset * row_x - depth * row_y
+                column = origin_column + offset * column_x - depth * column_y
+                if offset * offset + depth * depth <= radius_squared:
+                    seen.add((row, column))
+
+                opaque = self._opaque(row, column)
+                if blocked:
+                    if opaque:
+                        next_start = right
+                        continue
+                    blocked = False
+                    start = next_start
+                elif opaque and depth < radius:
+                    blocked = True
+                    self._cast(seen, origin, depth + 1, start, left, radius,
+                               octant)
+                    next_start = right
+            if blocked:
+                break
+
+
+_views: WeakKeyDictionary[Maze, FieldOfView] = WeakKeyDictionary()
+
+
+def field_of_view(maze: Maze) -> FieldOfView:
+    """ Returns the shared FieldOfView of a maze. """
+    if maze.matches_origin():
+        maze = maze.get_origin()
+    view = _views.get(maze)
+    if view is None:
+        view = _views[maze] = FieldOfView(maze)
+    return view
+
+
+class FogOfWar(object):
+    """ What one player has explored, for every maze they have played.
+        Explored cells are kept per maze layout, so unlocking a door, which
+        copies a shared maze, does not forget them.
+    """
+
+    def __init__(self, radius: int = DEFAULT_RADIUS) -> None:
+        self._radius = radius
+        # explored bitmap and list of explored cells per maze layout
+        self._explored: WeakKeyDictionary[Maze, tuple[bytearray,
+                                                      list[tuple[int, int]]]]
+        self._explored = WeakKeyDictionary()
+
+    def update(self, maze: Maze,
+               position: tuple[int, int]) -> frozenset[tuple[int, int]]:
+        """ Marks what can be seen from position as explored.
+
+        Returns:
+            The positions visible from position
+        """
+        visible = field_of_view(maze).visible(position, self._radius)
+        bitmap, cells = self._explored_in(maze)
+        columns = maze.get_dimensions()[1]
+        for row, column in visible:
+            index = row * columns + column
+            if not bitmap[index]:
+                bitmap[index] = 1
+                cells.append((row, column))
+        return visible
+
+    def _explored_in(self, maze: Maze) -> tuple[bytearray,
+                                                list[tuple[int, int]]]:
+        origin = maze.get_origin()
+        explored = self._explored.get(origin)
+        if explored is None:
+            rows, columns = maze.get_dimensions()
+            explored = self._explored[origin] = (bytearray(rows * columns), [])
+        return explored
+
+    def get_explored(self, maze: Maze) -> list[tuple[int, int]]:
+        """ Returns every position explored in a maze, in the order they were
+            first seen.
+        """
+        return self._explored_in(maze)[1]
+
+    def is_explored(self, maze: Maze, position: tuple[int, int]) -> bool:
+        columns = maze.get_dimensions()[1]
+        return bool(self._explored_in(maze)[0][position[0] * columns
+                                               + position[1]])
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._radius})'
+
+
+class FogOfWarInterface(TextInterface):
+    """ A text interface that only shows what the player can see or has
+        already explored. Only explored cells are visited when drawing.
+    """
+
+    def __init__(self, fog: Optional[FogOfWar] = None) -> None:
+        self._fog = FogOfWar() if fog is None else fog
+
+    def _draw_level(
+        self,
+        maze: Maze,
+        items: dict[tuple[int, int], Item],
+        player_position: tuple[int, int]
+    ) -> None:
+        self._fog.update(maze, player_position)
+        num_rows, num_cols = maze.get_dimensions()
+        lines = [[EMPTY] * num_cols for _ in range(num_rows)]
+        for row, column in self._fog.get_explored(maze):
+            item = items.get((row, column))
+            lines[row][column] = item.get_id() if item is not None \
+                else maze.get_tile((row, column)).get_id()
+        row, column = player_position
+        lines[row][column] = PLAYER
+        for line in lines:
+            print(''.join(line))
@@ -0,0 +1,347 @@
+""" A graph view of a maze with its corridors contracted into edges.
+
+Nodes are the cells a search has to stop at: junctions, dead ends, items,
+doors and the player start. Every other open cell has exactly two open
+neighbours, so it lies on a corridor between two nodes, and each corridor
+becomes one edge in each direction holding its length, the health lost
+walking it (one per move plus lava damage) and the moves that walk it.
+
+Doors are nodes whether locked or not, so unlocking one only flips a flag on
+its node and never changes the edges. Searches start or end on cells inside a
+corridor by linking them to the nodes at its ends for that search only.
+"""
+from __future__ import annotations
+import heapq
+from typing import Iterable, Optional, Union
+
+from a2 import BLOCKED_CELL, OUTSIDE_CELL, Level
+from constants import *
+
+_DELTAS = tuple(MOVE_DELTAS.values())
+
+
+class Edge(object):
+    """ A corridor walked from one node to another. """
+    __slots__ = ('target', 'length', 'cost', 'moves')
+
+    def __init__(self, target: int, length: int, cost: int,
+                 moves: tuple[tuple[int, int], ...]) -> None:
+        """
+        Parameters:
+            target (int): Index of the node the corridor leads to
+            length (int): Number of moves along the corridor
+            cost (int): Health lost walking the corridor
+            moves (tuple): The (row, column) deltas that walk it, in order
+        """
+        self.target = target
+        self.length = length
+        self.cost = cost
+        self.moves = moves
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}({self.target}, {self.length}, '
+                f'{self.cost}, {self.moves!r})')
+
+
+class MazeGraph(object):
+    """ The corridor graph of a level. It follows doors unlocking in the
+        level, but not changes to other tiles.
+    """
+
+    def __init__(self, level: Level) -> None:
+        """ Builds the graph of a level in its current state.
+
+        Parameters:
+            level (Level): The level to build the graph of
+        """
+        self._level = level
+        maze = level.get_maze()
+        self._maze = maze
+        self._revision = maze.get_revision()
+        costs = maze.get_cost_table()
+        offsets = [maze.get_neighbour_offsets()[delta] for delta in _DELTAS]
+        self._offsets = offsets
+        rows, columns = maze.get_dimensions()
+
+        doors = {maze.index_of(position)
+                 for position in maze.get_door_positions()
+                 if 0 <= position[0] < rows and 0 <= position[1] < columns}
+        # doors count as open so that unlocking one never changes the edges
+        self._open = bytearray(cost < OUTSIDE_CELL for cost in costs)
+        for index in doors:
+            self._open[index] = 1
+        open_cells = self._open
+
+        special = set(doors)
+        special.update(maze.index_of(position)
+                       for position in level.get_items())
+        if level.get_player_start() is not None:
+            special.add(maze.index_of(level.get_player_start()))
+
+        # node index of each node cell, by cost table index
+        self._node_of: dict[int, int] = {}
+        self._cells: list[int] = []
+        for index, is_open in enumerate(open_cells):
+            if not is_open:
+                continue
+            degree = sum(open_cells[index + offset] for offset in offsets)
+            if degree != 2 or index in special:
+                self._node_of[index] = len(self._cells)
+                self._cells.append(index)
+
+        self._locked = bytearray(len(self._cells))
+        self._door_nodes = [self._node_of[index] for index in sorted(doors)]
+        self._edges: list[list[Edge]] = []
+        for index in self._cells:
+            edges = []
+            for delta, offset in zip(_DELTAS, offsets):
+                walk = self._walk(index, delta, offset)
+                if walk is not None and walk[0] != index:
+                    end, length, cost, moves = walk
+                    edges.append(Edge(self._node_of[end], length, cost,
+                                      moves))
+            self._edges.append(edges)
+        self._sync_doors()
+
+    def _walk(self, index: int, delta: tuple[int, int],
+              offset: int) -> Optional[tuple[int, int, int,
+                                             tuple[tuple[int, int], ...]]]:
+        """ Follows the corridor leaving index by delta up to the next node.
+
+        Returns:
+            (node cell, length, cost, moves), or None if the cell that way is
+            not open or the corridor loops without reaching a node
+        """
+        open_cells = self._open
+        current = index + offset
+        if not open_cells[current]:
+            return None
+        moves = [delta]
+        cost = 1 + self._entry_cost(current)
+        previous = index
+        while current not in self._node_of:
+            for next_delta, next_offset in zip(_DELTAS, self._offsets):
+                following = current + next_offset
+                if following != previous and open_cells[following]:
+                    break
+            previous, current = current, following
+            moves.append(next_delta)
+            cost += 1 + self._entry_cost(current)
+            if current == index:
+                break
+        return current, len(moves), cost, tuple(moves)
+
+    def _entry_cost(self, index: int) -> int:
+        """ Returns the damage for entering a cell, counting a door as open.
+        """
+        cost = self._maze.get_cost_table()[index]
+        return 0 if cost >= OUTSIDE_CELL else cost
+
+    def _sync_doors(self) -> None:
+        """ Copies the locked state of every door from the maze. """
+        maze = self._level.get_maze()
+        self._maze = maze
+        self._revision = maze.get_revision()
+        costs = maze.get_cost_table()
+        for node in self._door_nodes:
+            self._locked[node] = costs[self._cells[node]] >= BLOCKED_CELL
+
+    def _refresh(self) -> None:
+        """ Catches up with doors unlocked in the level since the last search.
+            Unlocking a door in a shared maze replaces the level's maze with a
+            copy, so the maze itself is compared as well as its revision.
+        """
+        maze = self._level.get_maze()
+        if maze is not self._maze or maze.get_revision() != self._revision:
+            self._sync_doors()
+
+    def unlock_door(self, position: Optional[tuple[int, int]] = None) -> None:
+        """ Marks the door at position, or every door, as unlocked in the
+            graph only, for planning as if it were open.
+        """
+        if position is None:
+            for node in self._door_nodes:
+                self._locked[node] = 0
+        else:
+            self._locked[self._node_of[self._maze.index_of(position)]] = 0
+
+    def get_nodes(self) -> list[tuple[int, int]]:
+        """ Getter method for the position of every node, in node order. """
+        return [self._maze.position_of(index) for index in self._cells]
+
+    def get_edges(self, position: tuple[int, int]) -> list[Edge]:
+        """ Getter method for the edges leaving the node at position. """
+        return self._edges[self._node_of[self._maze.index_of(position)]]
+
+    def is_node(self, position: tuple[int, int]) -> bool:
+        return self._maze.index_of(position) in self._node_of
+
+    def is_locked(self, position: tuple[int, int]) -> bool:
+        """ Checks if the node at position is a locked door. """
+        self._refresh()
+        return bool(self._locked[self._node_of[self._maze.index_of(position)]])
+
+    def edge_count(self) -> int:
+        return sum(len(edges) for edges in self._edges)
+
+    def __len__(self) -> int:
+        return len(self._cells)
+
+    def _attach(self, index: int, leaving: bool) -> list[tuple[int, Edge]]:
+        """ Links a cell inside a corridor to the nodes at both its ends.
+
+        Parameters:
+            index (int): Cost table index of the cell
+            leaving (bool): True for edges from the cell to the nodes, False
+                            for edges from the nodes to the cell
+
+        Returns:
+            (node, edge) pairs, where the edge leads away from the cell if
+            leaving, and is keyed by its starting node otherwise
+        """
+        links = []
+        for delta, offset in zip(_DELTAS, self._offsets):
+            walk = self._walk(index, delta, offset)
+            if walk is None or walk[0] == index:
+                continue
+            end, length, cost, moves = walk
+            node = self._node_of[end]
+            if leaving:
+                links.append((node, Edge(node, length, cost, moves)))
+                continue
+            # walking back enters the cells in the opposite order, ending on
+            # the cell itself rather than on the node
+            cost += self._entry_cost(index) - self._entry_cost(end)
+            back = tuple((-row, -column) for row, column in reversed(moves))
+            links.append((node, Edge(-1, length, cost, back)))
+        return links
+
+    def _within_corridor(self, start: int, goals: set[int]
+                         ) -> list[tuple[int, int,
+                                         tuple[tuple[int, int], ...]]]:
+        """ Finds goals on the same corridor as start without passing a node.
+
+        Returns:
+            (goal cell, cost, moves) of each way to reach one
+        """
+        found = []
+        for delta, offset in zip(_DELTAS, self._offsets):
+            current, previous = start + offset, start
+            if not self._open[current]:
+                continue
+            moves = [delta]
+            cost = 1 + self._entry_cost(current)
+            while current not in goals:
+                if current in self._node_of or current == start:
+                    break
+                for next_delta, next_offset in zip(_DELTAS, self._offsets):
+                    following = current + next_offset
+                    if following != previous and self._open[following]:
+                        break
+                previous, current = current, following
+                moves.append(next_delta)
+                cost += 1 + self._entry_cost(current)
+            else:
+                found.append((current, cost, tuple(moves)))
+        return found
+
+    def shortest_path(self, start: tuple[int, int],
+                      goals: Union[tuple[int, int],
+                                   Iterable[tuple[int, int]]],
+                      by: str = 'cost'
+                      ) -> Optional[tuple[tuple[int, int],
+                                          int, list[tuple[int, int]]]]:
+        """ Finds the cheapest route from start to the nearest of the goals,
+            never entering a locked door.
+
+        Parameters:
+            start (tuple): The (row, column) to start from
+            goals: One (row, column) or any number of them
+            by (str): 'cost' to minimise health lost, 'length' for moves
+
+        Returns:
+            (goal reached, its cost, the moves to make), or None if no goal
+            can be reached
+        """
+        self._refresh()
+        maze = self._maze
+        if isinstance(goals, tuple) and goals and isinstance(goals[0], int):
+            goals = [goals]
+        goal_cells = {maze.index_of(goal) for goal in goals
+                      if self._open[maze.index_of(goal)]}
+        goal_cells = {cell for cell in goal_cells
+                      if not (cell in self._node_of
+                              and self._locked[self._node_of[cell]])}
+        start_cell = maze.index_of(start)
+        if not goal_cells or not self._open[start_cell]:
+            return None
+        if start_cell in goal_cells:
+            return start, 0, []
+        weight = 'cost' if by == 'cost' else 'length'
+
+        # goals inside corridors are reached from the nodes at their ends
+        goal_links: dict[int, list[tuple[int, Edge]]] = {}
+        for cell in goal_cells:
+            if cell in self._node_of:
+                continue
+            for node, edge in self._attach(cell, leaving=False):
+                edge.target = cell
+                goal_links.setdefault(node, []).append((cell, edge))
+
+        # search states are node indices, then goal cells as -1 - cell so
+        # the two never collide
+        best: dict[int, int] = {}
+        came_from: dict[int, tuple[int, tuple[tuple[int, int], ...]]] = {}
+        heap = []
+        counter = 0
+
+        def push(state: int, cost: int, previous: Optional[int],
+                 moves: tuple[tuple[int, int], ...]) -> None:
+            nonlocal counter
+            if cost < best.get(state, cost + 1):
+                best[state] = cost
+                came_from[state] = (previous, moves)
+                counter += 1
+                heapq.heappush(heap, (cost, counter, state))
+
+        if start_cell in self._node_of:
+            push(self._node_of[start_cell], 0, None, ())
+        else:
+            for node, edge in self._attach(start_cell, leaving=True):
+                if not self._locked[node]:
+                    push(node, getattr(edge, weight), None, edge.moves)
+            for cell, cost, moves in self._within_corridor(start_cell,
+                                                           goal_cells):
+                push(-1 - cell, cost if weight == 'cost' else len(moves),
+                     None, moves)
+
+        while heap:
+            cost, _, state = heapq.heappop(heap)
+            if cost > best[state]:
+                continue
+            if state < 0 or self._cells[state] in goal_cells:
+                cell = -1 - state if state < 0 else self._cells[state]
+                return maze.position_of(cell), cost, self._moves_to(state,
+                                                                     came_from)
+            for edge in self._edges[state]:
+                if not self._locked[edge.target]:
+                    push(edge.target, cost + getattr(edge, weight), state,
+                         edge.moves)
+            for cell, edge in goal_links.get(state, ()):
+                push(-1 - cell, cost + getattr(edge, weight), state,
+                     edge.moves)
+        return None
+
+    @staticmethod
+    def _moves_to(state: int, came_from: dict[int, tuple[
+            Optional[int], tuple[tuple[int, int], ...]]]
+                  ) -> list[tuple[int, int]]:
+        """ Expands the edges of a search back into moves. """
+        parts = []
+        while state is not None:
+            state, moves = came_from[state]
+            parts.append(moves)
+        return [move for moves in reversed(parts) for move in moves]
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._level!r})'
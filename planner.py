@@ -0,0 +1,261 @@
+""" Planning when to use items so that a player survives a fixed route.
+
+The planner searches over (step, stat, item counts) with memoisation. Health,
+hunger and thirst never affect each other and each item changes only one of
+them, so each stat is planned on its own with the items that change it, and
+the route is survived only if all three are.
+
+Using an item later never leaves a player worse off, as stats are capped and
+only ever get worse between uses, so items are only considered on the step
+that would otherwise kill the player. The best time for each use is therefore
+the last moment it can be made. Branches that cannot survive even if every
+item restored its full amount are cut off without being searched.
+
+Routes are broken into interned suffixes, so the answers for the rest of a
+route are shared between every query whose route ends the same way, across
+calls as well as within one.
+"""
+from __future__ import annotations
+from typing import Optional
+
+from a2 import (ENTITY_TYPES, BLOCKED_CELL, OUTSIDE_CELL, Inventory, Level,
+                Model)
+from constants import *
+
+# usable items, in the order their counts are kept
+USABLE = (POTION, APPLE, HONEY, WATER)
+_NAMES = tuple(ENTITY_TYPES[item_id].__name__ for item_id in USABLE)
+_NO_PICKUP = -1
+
+HEALTH, HUNGER, THIRST = 0, 1, 2
+_MAXIMUMS = (MAX_HEALTH, MAX_HUNGER, MAX_THIRST)
+# the items that change each stat, as indices into USABLE, and their amounts
+_STAT_ITEMS = ((0,), (1, 2), (3,))
+_AMOUNTS = (POTION_AMOUNT, APPLE_AMOUNT, HONEY_AMOUNT, WATER_AMOUNT)
+
+# a state is (stat, suffix node, stat value, moves made mod 5, counts of the
+# items that change the stat)
+State = tuple[int, int, int, int, tuple[int, ...]]
+
+
+def _clamp(value: int, maximum: int) -> int:
+    return max(0, min(value, maximum))
+
+
+class SurvivalPlanner(object):
+    """ Finds the fewest item uses that keep a player alive along a route,
+        keeping the highest health where several plans use as few items.
+
+        One planner can serve many levels and players, its cache holds only
+        facts about the route suffixes it has seen.
+    """
+
+    def __init__(self) -> None:
+        # suffix node ids, node 0 is the end of every route
+        self._nodes: dict[tuple[int, int, int], int] = {}
+        self._node_steps: list[tuple[int, int, int]] = [(0, _NO_PICKUP, 0)]
+        # the number of steps, health lost and items picked up from each node
+        # to the end of its route
+        self._node_totals: list[tuple[int, int, tuple[int, ...]]] = [
+            (0, 0, (0,) * len(USABLE))]
+        # best (uses, badness at the end), item used or None to move, and the
+        # next state, or None if the state cannot survive
+        self._cache: dict[State, Optional[tuple[tuple[int, int],
+                                                Optional[int],
+                                                Optional[State]]]] = {}
+
+    def _intern_route(self, level: Level,
+                      route: list[tuple[int, int]]) -> int:
+        """ Interns every suffix of a route, returning the node of the whole
+            route. A node is the cost of its first step, the item picked up on
+            it and the node of the steps after it.
+        """
+        maze = level.get_maze()
+        items = level.get_items()
+        # doors unlock once the route has picked up every coin left
+        coins = sum(item.get_id() == COIN for item in items.values())
+        pickups = []
+        seen = set()
+        for position in route:
+            cost = maze.get_cost(position)
+            if cost == BLOCKED_CELL and coins == 0 and maze.is_door(position):
+                cost = 0
+            if cost in (BLOCKED_CELL, OUTSIDE_CELL):
+                raise ValueError(f'Route enters {position}, which is blocked')
+            item = items.get(position) if position not in seen else None
+            seen.add(position)
+            if item is not None and item.get_id() == COIN:
+                coins -= 1
+            pickup = _NO_PICKUP
+            if item is not None and item.get_id() in USABLE:
+                pickup = USABLE.index(item.get_id())
+            pickups.append((cost, pickup))
+
+        node = 0
+        for cost, pickup in reversed(pickups):
+            key = (cost, pickup, node)
+            node = self._nodes.get(key)
+            if node is None:
+                steps, lost, picked = self._node_totals[key[2]]
+                if pickup != _NO_PICKUP:
+                    picked = picked[:pickup] + (picked[pickup] + 1,) \
+                             + picked[pickup + 1:]
+                node = self._nodes[key] = len(self._node_steps)
+                self._node_steps.append(key)
+                self._node_totals.append((steps + 1, lost + 1 + cost, picked))
+        return node
+
+    def _hopeless(self, state: State) -> bool:
+        """ Checks if a state cannot survive the rest of its route even if no
+            item were wasted by the stat caps.
+        """
+        stat, node, value, moves, counts = state
+        steps, lost, picked = self._node_totals[node]
+        restores = sum((count + picked[item]) * _AMOUNTS[item]
+                       for item, count in zip(_STAT_ITEMS[stat], counts))
+        if stat == HEALTH:
+            return value + restores <= lost
+        return value + (moves + steps) // 5 + restores >= _MAXIMUMS[stat]
+
+    def _successors(self, state: State) -> list[tuple[Optional[int],
+                                                      Optional[State]]]:
+        """ Lists the choices worth considering in a state, None meaning to
+            make the next move, with the state each leads to, or None if the
+            player dies. Items are only offered when the move would kill.
+        """
+        stat, node, value, moves, counts = state
+        maximum = _MAXIMUMS[stat]
+        items = _STAT_ITEMS[stat]
+
+        cost, pickup, next_node = self._node_steps[node]
+        next_moves = (moves + 1) % 5
+        if stat == HEALTH:
+            next_value = _clamp(value - 1 - cost, maximum)
+            alive = next_value > 0
+        else:
+            next_value = _clamp(value + (next_moves == 0), maximum)
+            alive = next_value < maximum
+        next_counts = counts
+        if pickup in items:
+            slot = items.index(pickup)
+            next_counts = counts[:slot] + (counts[slot] + 1,) \
+                          + counts[slot + 1:]
+        if alive:
+            return [(None, (stat, next_node, next_value, next_moves,
+                            next_counts))]
+
+        choices = [(None, None)]
+        for slot, item in enumerate(items):
+            used = _clamp(value + _AMOUNTS[item], maximum)
+            # an item that changes nothing is never worth using
+            if counts[slot] == 0 or used == value:
+                continue
+            remaining = counts[:slot] + (counts[slot] - 1,) + counts[slot + 1:]
+            choices.append((item, (stat, node, used, moves, remaining)))
+        return choices
+
+    def _solve(self, root: State) -> None:
+        """ Fills the cache for root and every state reachable from it,
+            children before parents, without recursion so long routes do not
+            hit the recursion limit.
+        """
+        cache = self._cache
+        stack = [root]
+        while stack:
+            state = stack[-1]
+            if state in cache:
+                stack.pop()
+                continue
+            if state[1] == 0:
+                badness = -state[2] if state[0] == HEALTH else state[2]
+                cache[state] = ((0, badness), None, None)
+                stack.pop()
+                continue
+            if self._hopeless(state):
+                cache[state] = None
+                stack.pop()
+                continue
+
+            successors = self._successors(state)
+            missing = [child for _, child in successors
+                       if child is not None and child not in cache]
+            if missing:
+                stack.extend(missing)
+                continue
+
+            best = None
+            for choice, child in successors:
+                if child is None or cache[child] is None:
+                    continue
+                uses, badness = cache[child][0]
+                value = (uses + (choice is not None), badness)
+                if best is None or value < best[0]:
+                    best = (value, choice, child)
+            cache[state] = best
+            stack.pop()
+
+    def plan(self, level: Level, route: list[tuple[int, int]],
+             inventory: Inventory, stats: tuple[int, int, int],
+             moves_made: int = 0) -> Optional[list[tuple[int, str]]]:
+        """ Plans item use for a player following a route through a level.
+
+        Parameters:
+            level (Level): The level in its current state
+            route (list): Positions the player moves to, in order
+            inventory (Inventory): The items the player holds
+            stats (tuple): The player's (HP, hunger, thirst)
+            moves_made (int): Moves made so far in the game
+
+        Returns:
+            (step, item name) for each item to use, in order, where step is
+            the number of moves made before using it, or None if the route
+            cannot be survived
+
+        Raises:
+            ValueError: If the route enters a blocking tile, doors count as
+                        open once the route has picked up every coin
+        """
+        node = self._intern_route(level, route)
+        held = inventory.get_items()
+        counts = [len(held.get(name, [])) for name in _NAMES]
+
+        uses = []
+        for stat, items in enumerate(_STAT_ITEMS):
+            state = (stat, node, stats[stat], moves_made % 5,
+                     tuple(counts[item] for item in items))
+            self._solve(state)
+            if self._cache[state] is None:
+                return None
+
+            step = 0
+            while state[1] != 0:
+                _, choice, state = self._cache[state]
+                if choice is None:
+                    step += 1
+                else:
+                    uses.append((step, _NAMES[choice]))
+        uses.sort(key=lambda use: use[0])
+        return uses
+
+    def plan_for(self, model: Model,
+                 route: list[tuple[int, int]]) -> Optional[list[tuple[int,
+                                                                      str]]]:
+        """ Plans item use for the player of a game following a route through
+            the current level, see plan.
+        """
+        return self.plan(model.get_level(), route, model.get_player_inventory(),
+                         model.get_player_stats(), model.get_moves_made())
+
+    def can_survive(self, model: Model, route: list[tuple[int, int]]) -> bool:
+        """ Checks if the player of a game can survive a route. """
+        return self.plan_for(model, route) is not None
+
+    def clear(self) -> None:
+        """ Empties the cache. """
+        self._nodes.clear()
+        del self._node_steps[1:]
+        del self._node_totals[1:]
+        self._cache.clear()
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}()'
@@ -0,0 +1,108 @@
+""" Tests for a2.py, run with `python -m pytest`. """
+import os
+
+from a2 import BLOCKED_CELL, OUTSIDE_CELL, Model, load_game
+from constants import *
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES = os.path.join(HERE, 'games')
+GAME_1 = os.path.join(GAMES, 'game1.txt')
+GAME_2 = os.path.join(GAMES, 'game2.txt')
+SIMPLE_GAME = os.path.join(HERE, 'game_examples', 'simple_game.txt')
+
+
+def test_shared_level_changes_stay_in_one_game():
+    # the first level of game1.txt and game2.txt is the same, so both files
+    # get copies of one interned level
+    changed = load_game(GAME_1)[0]
+    other = load_game(GAME_2)[0]
+    assert str(changed) == str(other)
+    pristine = str(other.get_maze())
+
+    changed.add_row('#MMM#')
+    changed.get_maze().get_tile((1, 4)).unlock()
+    changed.get_maze().unlock_door()
+    changed.get_items().pop((1, 2))
+
+    fresh = Model(GAME_2).get_level()
+    for level in (other, fresh):
+        maze = level.get_maze()
+        assert str(maze) == pristine
+        assert len(maze.get_tiles()) == 5
+        assert maze.get_tile((1, 4)).is_blocking()
+        assert maze.get_cost((1, 4)) == BLOCKED_CELL
+        assert (1, 2) in level.get_items()
+        assert (4, 1) not in level.get_items()
+
+
+def _read_transcript(filename):
+    """ Splits a recorded game into its moves and the frame shown after each.
+
+    Returns:
+        The first frame, then a (move, frame) pair for each move that showed
+        one, where a frame is (maze rows, position, (health, hunger, thirst)),
+        or None once the game is won
+    """
+    with open(filename) as file:
+        blocks = file.read().split('Enter a move: ')
+
+    def frame(block):
+        if WIN_MESSAGE in block:
+            return None
+        lines = block.split('\n')
+        maze = lines[1:lines.index('---------------')]
+        row = next(row for row, line in enumerate(maze) if PLAYER in line)
+        stats = tuple(int(line.split(': ')[1]) for line in lines
+                      if line.startswith(('HP: ', 'hunger: ', 'thirst: ')))
+        return len(maze), (row, maze[row].index(PLAYER)), stats
+
+    moves = [(block[0], frame(block)) for block in blocks[1:]
+             if block[0] in MOVE_DELTAS]
+    return frame(blocks[0]), moves
+
+
+def test_replay_simple_game():
+    first, moves = _read_transcript(SIMPLE_GAME)
+    model = Model(GAME_1)
+    rows = first[0]
+    assert (model.get_player().get_position(),
+            model.get_player_stats()) == first[1:]
+
+    for move, frame in moves:
+        model.move_player(MOVE_DELTAS[move])
+        if frame is None:
+            assert model.has_won()
+            break
+        # a level ends when the maze shown changes size
+        assert model.did_level_up() == (frame[0] != rows)
+        rows = frame[0]
+        assert model.get_level().get_dimensions()[0] == rows
+        assert (model.get_player().get_position(),
+                model.get_player_stats()) == frame[1:]
+    assert moves[-1][1] is None and model.get_levels_completed() == 2
+
+
+def test_get_cost_outside_the_maze():
+    maze = Model(GAME_1).get_current_maze()
+    rows, columns = maze.get_dimensions()
+    for position in ((-1, 0), (0, -1), (rows, 0), (0, columns),
+                     (-5, -5), (rows + 5, columns + 5)):
+        assert maze.get_cost(position) == OUTSIDE_CELL
+    assert maze.get_cost((0, 0)) == BLOCKED_CELL
+    assert maze.get_cost((1, 1)) == 0
+
+
+def test_cost_table_after_unlock_door():
+    level = load_game(GAME_1)[0]
+    maze = level.get_maze()
+    table = bytes(maze.get_cost_table())
+    assert maze.get_cost((1, 4)) == BLOCKED_CELL
+
+    level.unlock_door((1, 4))
+    assert maze.get_cost((1, 4)) == 0
+    changed = [index for index, (before, after)
+               in enumerate(zip(table, maze.get_cost_table()))
+               if before != after]
+    assert changed == [maze.index_of((1, 4))]
+    # the door leads out of the maze, which stays outside
+    assert maze.get_cost((1, 5)) == OUTSIDE_CELL
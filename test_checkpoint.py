@@ -0,0 +1,36 @@
+""" Tests for checkpoint.py, run with `python -m pytest`. """
+import os
+
+import pytest
+
+from a2 import Model
+from checkpoint import restore_checkpoint, save_checkpoint
+from constants import *
+
+GAME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games',
+                         'game1.txt')
+
+
+def _checkpoint():
+    model = Model(GAME_FILE)
+    for move in (RIGHT, RIGHT, UP):
+        model.move_player(MOVE_DELTAS[move])
+    return model, save_checkpoint(model)
+
+
+def test_restore_round_trip():
+    model, data = _checkpoint()
+    restored = restore_checkpoint(data, GAME_FILE)
+    assert restored.get_player().get_position() == \
+        model.get_player().get_position()
+    assert restored.get_player_stats() == model.get_player_stats()
+    assert str(restored.get_level()) == str(model.get_level())
+
+
+@pytest.mark.parametrize('change', [lambda data: data + b'junk',
+                                    lambda data: data[:-1],
+                                    lambda data: data[:10]])
+def test_restore_rejects_malformed_data(change):
+    _, data = _checkpoint()
+    with pytest.raises(ValueError):
+        restore_checkpoint(change(data), GAME_FILE)
@@ -0,0 +1,69 @@
+""" Tests for dynamic_entities.py, run with `python -m pytest`. """
+import random
+
+import pytest
+
+from a2 import Level
+from constants import *
+from dynamic_entities import DynamicEntityManager
+
+ROWS = ['#########',
+        '#   L   #',
+        '# ### # #',
+        '#     # #',
+        '#########']
+
+
+def _level():
+    level = Level((len(ROWS), len(ROWS[0])))
+    for row in ROWS:
+        level.add_row(row)
+    return level
+
+
+def _manager(level, count, seed=0):
+    rng = random.Random(seed)
+    open_cells = [(row, column) for row, line in enumerate(ROWS)
+                  for column, character in enumerate(line)
+                  if character != WALL]
+    manager = DynamicEntityManager(level)
+    for _ in range(count):
+        manager.add(rng.choice(open_cells), rng.choice(list(MOVE_DELTAS)))
+    return manager
+
+
+def test_step_arrays_matches_step_loop():
+    pytest.importorskip('numpy')
+    level = _level()
+    maze = level.get_maze()
+    offsets = [maze.get_neighbour_offsets()[delta]
+               for delta in MOVE_DELTAS.values()]
+    looped, vectorised = _manager(level, 50), _manager(level, 50)
+    for handle in range(0, 50, 3):
+        looped.remove(handle)
+        vectorised.remove(handle)
+
+    for _ in range(20):
+        looped._step_loop(maze.get_cost_table(), offsets)
+        vectorised._step_arrays(maze.get_cost_table(), offsets)
+        assert looped.get_positions() == vectorised.get_positions()
+        assert looped._headings == vectorised._headings
+
+
+def test_remove_keeps_handles_and_compacts():
+    level = _level()
+    manager = _manager(level, 10)
+    before = manager.get_positions()
+    for handle in (0, 4, 9):
+        manager.remove(handle)
+    manager.remove(4)
+
+    assert len(manager) == 7
+    assert len(manager._indices) == 7
+    assert manager.get_positions() == {handle: position for handle, position
+                                       in before.items()
+                                       if handle not in (0, 4, 9)}
+    handle = manager.add((1, 1))
+    assert handle == 10
+    assert manager.get_position(handle) == (1, 1)
+    assert handle in manager.collisions((1, 1))
@@ -0,0 +1,57 @@
+""" Tests for env.py, run with `python -m pytest`. """
+import os
+
+from a2 import ENTITY_TYPES, Item, register_entity
+from env import ACTIONS, ITEM_LAYERS, MazeEnv, VectorEnv
+from constants import *
+
+GAME_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'games',
+                         'game1.txt')
+
+
+def test_reset_restores_collected_items():
+    env = MazeEnv(GAME_FILE)
+    env.reset()
+    pristine = bytes(env._items)
+    env.step(ACTIONS.index(RIGHT))
+    assert env.get_model().get_player().get_position() == (3, 1)
+    env.step(ACTIONS.index(RIGHT))
+    assert bytes(env._items) != pristine
+    assert env.get_model().get_levels_completed() == 0
+
+    env.reset()
+    assert bytes(env._items) == pristine
+    assert env.observation()['player'].tolist()[5:] == [0] * len(ITEM_LAYERS)
+
+
+def test_vector_auto_reset_restores_collected_items():
+    vector = VectorEnv(GAME_FILE, 2, max_steps=2)
+    vector.reset()
+    pristine = bytes(vector._buffers.items)
+    vector.step([ACTIONS.index(RIGHT)] * 2)
+    _, _, _, truncated, infos = vector.step([ACTIONS.index(RIGHT)] * 2)
+    assert list(truncated) == [1, 1]
+    assert all('final' in info for info in infos)
+    assert bytes(vector._buffers.items) == pristine
+
+
+class Gem(Item):
+    def __init__(self, position):
+        super().__init__(position)
+        self._id = 'G'
+
+
+def test_entities_registered_after_import_are_skipped(tmp_path):
+    game_file = tmp_path / 'gem.txt'
+    game_file.write_text('Maze 1 - 3 5\n#####\nPGC D\n#####\n')
+    register_entity('G', Gem)
+    try:
+        env = MazeEnv(str(game_file))
+        env.reset()
+        pristine = bytes(env._items)
+        env.step(ACTIONS.index(RIGHT))
+    finally:
+        del ENTITY_TYPES['G']
+    assert env.get_model().get_player().get_position() == (1, 1)
+    assert bytes(env._items) == pristine
+    assert env.observation()['player'].tolist()[5:] == [0] * len(ITEM_LAYERS)
@@ -0,0 +1,20 @@
+""" Tests for validate.py, run with `python -m pytest`. """
+from validate import MAX_DIMENSION, validate_game
+
+
+def test_out_of_range_header_reports_declared_dimensions(tmp_path):
+    game_file = tmp_path / 'wide.txt'
+    columns = MAX_DIMENSION + 1
+    game_file.write_text(f'Maze 1 - 3 {columns}\n#####\nP C D\n#####\n')
+    problems = validate_game(str(game_file))
+    assert problems[0] == (f'line 1: dimensions 3 {columns} outside 0 to '
+                           f'{MAX_DIMENSION}')
+    assert problems[1:] == [f'Maze 1: row {row} has width 5, header says '
+                            f'{columns}' for row in range(3)]
+
+
+def test_unreadable_header_skips_row_checks(tmp_path):
+    game_file = tmp_path / 'bad.txt'
+    game_file.write_text('Maze 1 - 3\n#####\nP C D\n#####\n')
+    assert validate_game(str(game_file)) == ["line 1: bad header "
+                                             "'Maze 1 - 3'"]
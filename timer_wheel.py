@@ -0,0 +1,267 @@
+""" Real-time hunger and thirst decay for many games at once.
+
+A hierarchical timer wheel keeps every pending decay in a slot of one of
+several wheels, the first counting single ticks and each after it counting
+whole turns of the one before. Scheduling and cancelling are O(1), timers in
+outer wheels are moved inwards once per wheel as their time nears, and
+advancing skips straight over stretches of time with nothing due.
+
+StatDecay uses one wheel for every game it manages. All games due in the same
+tick are handled as one batch: their stats are changed, they are checked for a
+loss together, and the survivors are put back on the wheel with one list
+extend.
+"""
+from __future__ import annotations
+import time
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from a2 import Model
+
+DEFAULT_SLOTS = 64
+DEFAULT_WHEELS = 4
+# real-time equivalent of the five moves between decays
+DEFAULT_INTERVAL = 5.0
+DEFAULT_TICK = 0.1
+
+
+class Timer(object):
+    """ A pending timer, returned by TimerWheel.schedule to cancel it with. """
+    __slots__ = ('deadline', 'item', 'cancelled')
+
+    def __init__(self, deadline: int, item: Any) -> None:
+        self.deadline = deadline
+        self.item = item
+        self.cancelled = False
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self.deadline}, {self.item!r})'
+
+
+class TimerWheel(object):
+    """ Timers that fire on whole ticks. Time only moves on through advance.
+    """
+
+    def __init__(self, slots: int = DEFAULT_SLOTS,
+                 wheels: int = DEFAULT_WHEELS) -> None:
+        """ Sets up empty wheels at tick 0.
+
+        Parameters:
+            slots (int): Slots per wheel
+            wheels (int): Number of wheels, timers further away than
+                          slots ** wheels ticks wait in an overflow list
+        """
+        self._slots = slots
+        self._spans = [slots ** wheel for wheel in range(wheels + 1)]
+        self._wheels = [[[] for _ in range(slots)] for _ in range(wheels)]
+        self._overflow = []
+        # timers held by each wheel, and the overflow last, counting cancelled
+        # timers until they are dropped
+        self._counts = [0] * (wheels + 1)
+        self._now = 0
+
+    def get_tick(self) -> int:
+        """ Getter method for the current tick. """
+        return self._now
+
+    def __len__(self) -> int:
+        """ Returns the number of timers held, including cancelled ones that
+            have not been dropped yet.
+        """
+        return sum(self._counts)
+
+    def _slot_for(self, deadline: int) -> tuple[int, list[Timer]]:
+        """ Returns the wheel and the slot a deadline belongs in. """
+        delta = deadline - self._now
+        for wheel, slots in enumerate(self._wheels):
+            if delta < self._spans[wheel + 1]:
+                return wheel, slots[(deadline // self._spans[wheel])
+                                    % self._slots]
+        return len(self._wheels), self._overflow
+
+    def _place(self, timers: list[Timer], deadline: int) -> None:
+        wheel, slot = self._slot_for(deadline)
+        slot.extend(timers)
+        self._counts[wheel] += len(timers)
+
+    def schedule(self, deadline: int, item: Any) -> Timer:
+        """ Schedules item to be returned by advance at deadline, or at the
+            next tick if deadline has passed.
+
+        Parameters:
+            deadline (int): The tick to fire on
+            item: Anything, returned when the timer fires
+
+        Returns:
+            The timer, to cancel with
+        """
+        timer = Timer(max(deadline, self._now + 1), item)
+        self._place([timer], timer.deadline)
+        return timer
+
+    def schedule_many(self, deadline: int, items: Iterable[Any]) -> list[Timer]:
+        """ Schedules every item for the same deadline in one step, see
+            schedule.
+        """
+        deadline = max(deadline, self._now + 1)
+        timers = [Timer(deadline, item) for item in items]
+        self._place(timers, deadline)
+        return timers
+
+    @staticmethod
+    def cancel(timer: Timer) -> None:
+        """ Stops a timer from firing. It is dropped when its slot is next
+            visited.
+        """
+        timer.cancelled = True
+
+    def _cascade(self) -> None:
+        """ Moves the timers of every outer wheel whose turn starts at the
+            current tick inwards, outermost first so that no timer lands in a
+            slot that has already been visited this tick.
+        """
+        now = self._now
+        wheel = 1
+        while wheel <= len(self._wheels) and now % self._spans[wheel] == 0:
+            wheel += 1
+        for outer in range(wheel - 1, 0, -1):
+            if outer == len(self._wheels):
+                timers, self._overflow = self._overflow, []
+            else:
+                slot = (now // self._spans[outer]) % self._slots
+                timers = self._wheels[outer][slot]
+                self._wheels[outer][slot] = []
+            self._counts[outer] -= len(timers)
+            for timer in timers:
+                if not timer.cancelled:
+                    self._place([timer], timer.deadline)
+
+    def _skip_to(self, tick: int) -> None:
+        """ Moves time forward to just before the first tick up to tick where
+            something could happen, so that empty ticks are not visited.
+        """
+        wheel = 0
+        while wheel < len(self._counts) and self._counts[wheel] == 0:
+            wheel += 1
+        if wheel == 0:
+            return
+        if wheel == len(self._counts):
+            self._now = max(self._now, tick)
+            return
+        # nothing happens before the next turn of the innermost busy wheel
+        span = self._spans[min(wheel, len(self._wheels))]
+        next_turn = (self._now // span + 1) * span
+        self._now = max(self._now, min(tick, next_turn - 1))
+
+    def advance(self, tick: int) -> Iterator[tuple[int, list[Any]]]:
+        """ Moves time forward to tick, firing timers on the way.
+
+        Timers may be scheduled between batches, a deadline relative to the
+        tick of the batch being handled fires at the right time.
+
+        Yields:
+            (tick, items) for each tick that has timers firing, in order
+        """
+        while self._now < tick:
+            self._skip_to(tick)
+            if self._now >= tick:
+                break
+            self._now += 1
+            self._cascade()
+            slot = self._now % self._slots
+            timers = self._wheels[0][slot]
+            if not timers:
+                continue
+            self._wheels[0][slot] = []
+            self._counts[0] -= len(timers)
+            items = [timer.item for timer in timers if not timer.cancelled]
+            if items:
+                yield self._now, items
+
+    def __repr__(self) -> str:
+        return f'{type(self).__name__}({self._slots}, {len(self._wheels)})'
+
+
+class StatDecay(object):
+    """ Raises the hunger and thirst of every game it manages by one each
+        interval of real time, whether or not the player moves, in place of
+        the decay every fifth move.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL,
+                 tick: float = DEFAULT_TICK,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        """ Sets up a scheduler with no games.
+
+        Parameters:
+            interval (float): Seconds between decays of a game
+            tick (float): Seconds per tick, decays are rounded to ticks
+            clock (callable): Returns the current time in seconds
+        """
+        self._tick = tick
+        self._interval = max(1, round(interval / tick))
+        self._clock = clock
+        self._start = clock()
+        self._wheel = TimerWheel()
+        self._timers: dict[Model, Timer] = {}
+
+    def _now(self, now: Optional[float] = None) -> int:
+        seconds = self._clock() if now is None else now
+        return int((seconds - self._start) / self._tick)
+
+    def add(self, model: Model) -> None:
+        """ Starts decaying a game's stats in real time, the first decay is
+            one interval from now. Decay on moves is turned off for the game.
+        """
+        if model in self._timers:
+            return
+        model.set_move_decay(False)
+        self._timers[model] = self._wheel.schedule(
+            max(self._now(), self._wheel.get_tick()) + self._interval, model)
+
+    def remove(self, model: Model) -> None:
+        """ Stops decaying a game's stats and turns decay on moves back on. """
+        timer = self._timers.pop(model, None)
+        if timer is not None:
+            self._wheel.cancel(timer)
+            model.set_move_decay(True)
+
+    def __contains__(self, model: Model) -> bool:
+        return model in self._timers
+
+    def __len__(self) -> int:
+        return len(self._timers)
+
+    def advance(self, now: Optional[float] = None) -> list[Model]:
+        """ Applies every decay due up to now. Games that are lost or won stop
+            being managed.
+
+        Parameters:
+            now (float): The time to advance to, read from the clock if not
+                         given
+
+        Returns:
+            The games lost, in the order they were lost
+        """
+        lost = []
+        timers = self._timers
+        for tick, models in self._wheel.advance(self._now(now)):
+            survivors = []
+            for model in models:
+                player = model.get_player()
+                player.change_hunger(1)
+                player.change_thirst(1)
+                if model.has_lost():
+                    lost.append(model)
+                    del timers[model]
+                elif model.has_won():
+                    del timers[model]
+                else:
+                    survivors.append(model)
+            rescheduled = self._wheel.schedule_many(tick + self._interval,
+                                                    survivors)
+            timers.update(zip(survivors, rescheduled))
+        return lost
+
+    def __repr__(self) -> str:
+        return (f'{type(self).__name__}({self._interval * self._tick}, '
+                f'{self._tick})')
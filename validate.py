@@ -0,0 +1,215 @@
+""" Validation of game files before they are shipped in a level pack.
+
+Checks every level of a game file against its `Maze N - R C` header and
+checks that every Coin and the Door can be reached from the player start.
+
+Usage: python validate.py [--workers N] PATH [PATH ...]
+where each PATH is a game file or a directory of game files.
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+from collections import deque
+from multiprocessing import Pool
+from typing import Iterable, Iterator, Optional
+
+from a2 import Level, Coin
+from constants import *
+
+# largest rows or columns accepted in a header, a Level allocates its tables
+# from the header before any row is read
+MAX_DIMENSION = 1000
+
+
+def _read_levels(path: str) -> tuple[list[tuple[str, tuple[int, int], Level]],
+                                     list[str]]:
+    """ Reads the levels of a game file, keeping the raw header of each.
+
+    Parameters:
+        path (str): The path to the game file
+
+    Returns:
+        (levels, problems): levels holds (name, declared dimensions, Level)
+        for each level, with dimensions None if the header could not be read;
+        problems lists header lines that could not be read.
+    """
+    levels = []
+    problems = []
+    with open(path, 'r') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if line.startswith('Maze'):
+                name, _, dimensions = line.partition(' - ')
+                try:
+                    rows, columns = (int(item) for item in dimensions.split())
+                    declared = (rows, columns)
+                except ValueError:
+                    problems.append(f'line {number}: bad header {line!r}')
+                    declared = None
+                size = declared or (0, 0)
+                if declared is not None and not (
+                        0 <= rows <= MAX_DIMENSION
+                        and 0 <= columns <= MAX_DIMENSION):
+                    problems.append(f'line {number}: dimensions {rows} '
+                                    f'{columns} outside 0 to {MAX_DIMENSION}')
+                    # the rows are still read, into a level that allocates
+                    # nothing for them, to check them against the header
+                    size = (0, 0)
+                levels.append((name, declared, Level(size)))
+            elif len(line) > 0:
+                if len(levels) == 0:
+                    problems.append(f'line {number}: row before any header')
+                    continue
+                levels[-1][2].add_row(line)
+    return levels, problems
+
+
+def _reachable(level: Level) -> set[tuple[int, int]]:
+    """ Flood fills from the player start through non-blocking tiles.
+
+    Returns:
+        The set of reached positions, empty if the level has no start.
+    """
+    start = level.get_player_start()
+    tiles = level.get_maze().get_tiles()
+    if start is None:
+        return set()
+
+    reached = {start}
+    queue = deque([start])
+    while queue:
+        row, column = queue.popleft()
+        for row_delta, column_delta in MOVE_DELTAS.values():
+            position = (row + row_delta, column + column_delta)
+            if position in reached:
+                continue
+            new_row, new_column = position
+            if not (0 <= new_row < len(tiles)
+                    and 0 <= new_column < len(tiles[new_row])):
+                continue
+            if tiles[new_row][new_column].is_blocking():
+                continue
+            reached.add(position)
+            queue.append(position)
+    return reached
+
+
+def _validate_level(name: str, dimensions: Optional[tuple[int, int]],
+                    level: Level) -> list[str]:
+    """ Returns the problems found within a single level. """
+    problems = []
+    tiles = level.get_maze().get_tiles()
+
+    # rows cannot be checked against a header that could not be read
+    if dimensions is not None:
+        rows, columns = dimensions
+        if len(tiles) != rows:
+            problems.append(f'{name}: header says {rows} rows, '
+                            f'found {len(tiles)}')
+        for number, row in enumerate(tiles):
+            if len(row) != columns:
+                problems.append(f'{name}: row {number} has width {len(row)}, '
+                                f'header says {columns}')
+
+    start = level.get_player_start()
+    if start is None:
+        problems.append(f'{name}: no player start')
+        return problems
+
+    reached = _reachable(level)
+    for position, item in level.get_items().items():
+        if isinstance(item, Coin) and position not in reached:
+            problems.append(f'{name}: coin at {position} is unreachable')
+
+    doors = [(row, column) for row, tile_row in enumerate(tiles)
+             for column, tile in enumerate(tile_row) if tile.get_id() == DOOR]
+    if len(doors) == 0:
+        problems.append(f'{name}: no door')
+    for row, column in doors:
+        # a locked door blocks, so it is reached by standing next to it
+        if not any((row + row_delta, column + column_delta) in reached
+                   for row_delta, column_delta in MOVE_DELTAS.values()):
+            problems.append(f'{name}: door at {(row, column)} is unreachable')
+    return problems
+
+
+def validate_game(path: str) -> list[str]:
+    """ Validates every level in a game file.
+
+    Parameters:
+        path (str): The path to the game file
+
+    Returns:
+        A description of every problem found, empty if the file is valid.
+    """
+    try:
+        levels, problems = _read_levels(path)
+    except (OSError, UnicodeDecodeError) as error:
+        return [f'cannot read file: {error}']
+
+    if len(levels) == 0:
+        problems.append('no levels')
+    for name, dimensions, level in levels:
+        problems.extend(_validate_level(name, dimensions, level))
+    return problems
+
+
+def _validate_path(path: str) -> tuple[str, list[str]]:
+    """ Worker entry point, pairs a path with its problems. """
+    return path, validate_game(path)
+
+
+def find_game_files(paths: Iterable[str]) -> Iterator[str]:
+    """ Expands directories into the .txt game files they contain. """
+    for path in paths:
+        if os.path.isdir(path):
+            for directory, _, names in os.walk(path):
+                for name in sorted(names):
+                    if name.endswith('.txt'):
+                        yield os.path.join(directory, name)
+        else:
+            yield path
+
+
+def validate_games(paths: Iterable[str], workers: int | None = None,
+                   chunksize: int = 16) -> Iterator[tuple[str, list[str]]]:
+    """ Validates many game files on a process pool.
+
+    Parameters:
+        paths: Game files to validate
+        workers: Number of worker processes, defaults to the CPU count
+        chunksize: Number of files handed to a worker at a time
+
+    Yields:
+        (path, problems) for each file, in the order they finish.
+    """
+    if workers == 1:
+        yield from map(_validate_path, paths)
+        return
+    with Pool(workers) as pool:
+        yield from pool.imap_unordered(_validate_path, paths, chunksize)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('paths', nargs='+',
+                        help='game files or directories of game files')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='worker processes (default: CPU count)')
+    arguments = parser.parse_args()
+
+    checked = failed = 0
+    for path, problems in validate_games(find_game_files(arguments.paths),
+                                         arguments.workers):
+        checked += 1
+        if problems:
+            failed += 1
+            for problem in problems:
+                print(f'{path}: {problem}', flush=True)
+    print(f'{checked} files checked, {failed} with problems')
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()